@@ -12,10 +12,30 @@ def create_app():
     app.config.from_object(Config)
     
     # Initialize extensions
+    from app.db_engine import configure_engine_options, install_engine_events
+    configure_engine_options(app)
     db.init_app(app)
+    with app.app_context():
+        install_engine_events(db.engine)
     jwt.init_app(app)
     CORS(app)
     
+    from app.query_stats import install_query_stats, install_sql_profiler
+    install_query_stats()
+    install_sql_profiler(app)
+    
+    from app.metrics import install_metrics
+    install_metrics(app)
+    
+    from app.subscription_expiry import install_expiry_sweep
+    install_expiry_sweep(app)
+    
+    from app.webhook_inbox import install_webhook_inbox_worker
+    install_webhook_inbox_worker(app)
+    
+    from app.email_outbox import install_email_outbox_worker
+    install_email_outbox_worker(app)
+    
     # Register blueprints
     from app.auth import auth_bp
     from app.mood import mood_bp
@@ -60,4 +80,11 @@ def create_app():
             'timestamp': datetime.now().isoformat()
         })
     
+    from app.stats import collect_stats, require_ops_access
+    
+    @app.route('/stats')
+    @require_ops_access
+    def process_stats():
+        return jsonify(collect_stats())
+    
     return app
\ No newline at end of file
@@ -1,105 +1,225 @@
-from flask import Blueprint, request, jsonify
+from contextlib import closing
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-import openai
+import json
 import os
+import random
 from config import Config
+from app.openai_client import chat_completion, stream_chat_completion
+from app.content_pool import AFFIRMATION, JOURNAL_PROMPT, mood_bucket, system_prompt, take_from_pool
+from app.sentiment_cache import get_cached_sentiments, sentiment_cache_key, store_sentiment
+from app.sentiment_batch import MicroBatcher, classify_texts_with_openai
 
 ai_bp = Blueprint('ai', __name__)
 
-# Set OpenAI API key
-openai.api_key = Config.OPENAI_API_KEY
+FALLBACK_AFFIRMATIONS = [
+    "You are resilient and capable of overcoming challenges.",
+    "Each moment is a chance to choose peace and positivity.",
+    "Your journey matters, and you're doing better than you know.",
+    "You are stronger than you think and capable of amazing things.",
+    "Every small step forward is progress worth celebrating."
+]
+
+FALLBACK_PROMPTS = [
+    "Reflect on one thing that brought you peace today, no matter how small.",
+    "What would you like to let go of, and what would you like to welcome into your life?",
+    "Describe how you've grown in the past month, even in small ways.",
+    "What are three things you're grateful for today, and how did they make you feel?",
+    "Describe a moment today when you felt most like yourself. What was happening?"
+]
 
 def analyze_sentiment(text):
+    """Analyze sentiment of text with the local lexicon and/or OpenAI, per SENTIMENT_MODE"""
+    return analyze_sentiments([text])[0]['sentiment']
+
+def analyze_sentiments(texts):
+    """Analyze many texts at once, returning {'sentiment', 'source'} for each.
+    
+    Texts the local classifier is confident about never reach OpenAI; cached
+    results are reused; the rest share as few completions as possible.
+    """
+    mode = current_app.config.get('SENTIMENT_MODE', Config.SENTIMENT_MODE)
+    threshold = current_app.config.get('SENTIMENT_LOCAL_CONFIDENCE', Config.SENTIMENT_LOCAL_CONFIDENCE)
+    
+    # Imported on first use: the lexicon pulls in numpy, which slows worker startup
+    from app.sentiment_lexicon import classify_batch as classify_locally
+    local_results = classify_locally(texts)
+    results = [None] * len(texts)
+    pending = {}  # cache key -> indexes of texts the local classifier left open
+    
+    for index, (text, (local_sentiment, confidence)) in enumerate(zip(texts, local_results)):
+        if mode == 'local' or (mode == 'tiered' and confidence >= threshold):
+            results[index] = {'sentiment': local_sentiment, 'source': 'local'}
+        else:
+            pending.setdefault(sentiment_cache_key(text), []).append(index)
+    
+    # Reuse cached OpenAI results for identical text, looked up in one batch
+    for key, sentiment in get_cached_sentiments(list(pending)).items():
+        for index in pending.pop(key):
+            results[index] = {'sentiment': sentiment, 'source': 'cache'}
+    
+    if pending:
+        keys = list(pending)
+        labels = _classify_with_openai([texts[pending[key][0]] for key in keys])
+        for key, sentiment in zip(keys, labels):
+            if sentiment is not None:
+                store_sentiment(key, sentiment)
+            for index in pending[key]:
+                if sentiment is None:
+                    # Fall back to the local classifier; errors are not cached so the text is retried next time
+                    results[index] = {'sentiment': local_results[index][0], 'source': 'fallback'}
+                else:
+                    results[index] = {'sentiment': sentiment, 'source': 'llm'}
+    
+    return results
+
+def _batch_limits():
+    """Prompt token budget and item limit per completion, from the app config"""
+    return {
+        'token_budget': current_app.config.get('SENTIMENT_BATCH_TOKEN_BUDGET', Config.SENTIMENT_BATCH_TOKEN_BUDGET),
+        'max_items': current_app.config.get('SENTIMENT_BATCH_MAX_ITEMS', Config.SENTIMENT_BATCH_MAX_ITEMS)
+    }
+
+def _classify_microbatch(items):
+    # The flusher thread has no app context, so each item carries the limits read when it was submitted
+    texts = [text for text, _ in items]
+    return classify_texts_with_openai(texts, _classify_sentiment_with_openai, **items[-1][1])
+
+# Concurrent single-text lookups share one completion
+_micro_batcher = MicroBatcher(_classify_microbatch)
+
+def _classify_with_openai(texts):
+    """OpenAI labels for texts, None where the call failed"""
+    window_ms = current_app.config.get('SENTIMENT_MICROBATCH_WINDOW_MS', Config.SENTIMENT_MICROBATCH_WINDOW_MS)
+    limits = _batch_limits()
+    if len(texts) == 1 and window_ms > 0:
+        try:
+            future = _micro_batcher.submit(
+                (texts[0], limits), window_seconds=window_ms / 1000, max_items=limits['max_items']
+            )
+            return [future.result(timeout=60)]
+        except Exception as e:
+            print(f"Sentiment analysis error: {e}")
+            return [None]
+    return classify_texts_with_openai(texts, _classify_sentiment_with_openai, **limits)
+
+def _classify_sentiment_with_openai(text):
     """Analyze sentiment of text using OpenAI"""
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a sentiment analysis expert. Analyze the emotional tone of the given text and respond with only one word: positive, negative, neutral, or mixed."},
-                {"role": "user", "content": text}
-            ],
-            max_tokens=10,
-            temperature=0.1
-        )
-        
-        sentiment = response.choices[0].message.content.strip().lower()
-        return sentiment if sentiment in ['positive', 'negative', 'neutral', 'mixed'] else 'neutral'
-        
-    except Exception as e:
-        print(f"Sentiment analysis error: {e}")
-        return 'neutral'
+    content = chat_completion(
+        messages=[
+            {"role": "system", "content": "You are a sentiment analysis expert. Analyze the emotional tone of the given text and respond with only one word: positive, negative, neutral, or mixed."},
+            {"role": "user", "content": text}
+        ],
+        max_tokens=10,
+        temperature=0.1
+    )
+    
+    sentiment = content.strip().lower()
+    return sentiment if sentiment in ['positive', 'negative', 'neutral', 'mixed'] else 'neutral'
+
+def _sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def _wants_stream():
+    return request.args.get('stream', '').lower() in ('1', 'true')
+
+def _stream_generation(field, messages, max_tokens, fallbacks):
+    """Relay a live completion as Server-Sent Events.
+
+    Each piece of text arrives as a `data: {"delta": ...}` event and a final
+    `done` event carries the whole text under `field`. If generation fails the
+    `done` event carries a fallback instead, with `fallback: true`, and clients
+    should replace whatever they rendered from the deltas.
+    """
+    def events():
+        text = ''
+        try:
+            # Closing the chunk generator on client disconnect cancels the upstream request
+            with closing(stream_chat_completion(messages, max_tokens=max_tokens, temperature=0.7)) as chunks:
+                for delta in chunks:
+                    text += delta
+                    yield _sse_event({'delta': delta})
+        except Exception as e:
+            print(f"Streaming generation error: {e}")
+            yield _sse_event({field: random.choice(fallbacks), 'fallback': True}, event='done')
+            return
+        yield _sse_event({field: text.strip(), 'fallback': False}, event='done')
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @ai_bp.route('/affirmation', methods=['GET'])
 @jwt_required()
 def generate_affirmation():
+    if _wants_stream():
+        return _stream_generation('affirmation', [
+            {"role": "system", "content": system_prompt(AFFIRMATION)},
+            {"role": "user", "content": "Generate a daily affirmation for my mental wellness journey."}
+        ], max_tokens=100, fallbacks=FALLBACK_AFFIRMATIONS)
+    
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a supportive wellness coach. Generate a positive, encouraging affirmation for mental wellness. Keep it under 50 words and make it personal and uplifting."},
-                {"role": "user", "content": "Generate a daily affirmation for my mental wellness journey."}
-            ],
-            max_tokens=100,
-            temperature=0.7
-        )
-        
-        affirmation = response.choices[0].message.content.strip()
-        
-        return jsonify({'affirmation': affirmation})
-        
+        affirmation = take_from_pool(AFFIRMATION)
     except Exception as e:
-        print(f"Affirmation generation error: {e}")
-        # Return fallback affirmation on error
-        fallback_affirmations = [
-            "You are resilient and capable of overcoming challenges.",
-            "Each moment is a chance to choose peace and positivity.",
-            "Your journey matters, and you're doing better than you know.",
-            "You are stronger than you think and capable of amazing things.",
-            "Every small step forward is progress worth celebrating."
-        ]
-        import random
-        return jsonify({'affirmation': random.choice(fallback_affirmations)})
+        print(f"Affirmation pool error: {e}")
+        affirmation = None
+    
+    # Serve a canned affirmation while the pool is being refilled
+    if affirmation is None:
+        affirmation = random.choice(FALLBACK_AFFIRMATIONS)
+    
+    return jsonify({'affirmation': affirmation})
 
 @ai_bp.route('/journal-prompt', methods=['GET'])
 @jwt_required()
 def generate_journal_prompt():
+    mood = mood_bucket(request.args.get('mood', type=int))
+    
+    if _wants_stream():
+        return _stream_generation('prompt', [
+            {"role": "system", "content": system_prompt(JOURNAL_PROMPT, mood)},
+            {"role": "user", "content": "Give me a journal writing prompt for today."}
+        ], max_tokens=150, fallbacks=FALLBACK_PROMPTS)
+    
     try:
-        mood = request.args.get('mood')
-        
-        mood_context = f" The user's current mood is {mood}/5." if mood else ""
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": f"You are a therapeutic writing coach. Generate a thoughtful journal prompt for mental wellness and self-reflection.{mood_context} Make it encouraging and introspective, under 100 words."},
-                {"role": "user", "content": "Give me a journal writing prompt for today."}
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
-        
-        prompt = response.choices[0].message.content.strip()
-        
-        return jsonify({'prompt': prompt})
-        
+        prompt = take_from_pool(JOURNAL_PROMPT, mood)
     except Exception as e:
-        print(f"Journal prompt generation error: {e}")
-        # Return fallback prompt on error
-        fallback_prompts = [
-            "Reflect on one thing that brought you peace today, no matter how small.",
-            "What would you like to let go of, and what would you like to welcome into your life?",
-            "Describe how you've grown in the past month, even in small ways.",
-            "What are three things you're grateful for today, and how did they make you feel?",
-            "Describe a moment today when you felt most like yourself. What was happening?"
-        ]
-        import random
-        return jsonify({'prompt': random.choice(fallback_prompts)})
+        print(f"Journal prompt pool error: {e}")
+        prompt = None
+    
+    # Serve a canned prompt while the pool is being refilled
+    if prompt is None:
+        prompt = random.choice(FALLBACK_PROMPTS)
+    
+    return jsonify({'prompt': prompt})
 
 @ai_bp.route('/analyze-sentiment', methods=['POST'])
 @jwt_required()
 def analyze_text_sentiment():
     try:
         data = request.get_json()
+        
+        # Batch form: {"texts": [...]} returns one result per text, in order
+        texts = data.get('texts')
+        if texts is not None:
+            max_texts = current_app.config.get('SENTIMENT_BATCH_MAX_TEXTS', Config.SENTIMENT_BATCH_MAX_TEXTS)
+            if not isinstance(texts, list) or not texts:
+                return jsonify({'error': 'Texts must be a non-empty list'}), 400
+            if len(texts) > max_texts:
+                return jsonify({'error': f'At most {max_texts} texts can be analyzed per request'}), 400
+            if any(not isinstance(text, str) or not text.strip() for text in texts):
+                return jsonify({'error': 'Every text must be a non-empty string'}), 400
+            
+            results = analyze_sentiments(texts)
+            
+            return jsonify({
+                'results': [dict(result, index=index) for index, result in enumerate(results)],
+                'ai_enabled': True
+            })
+        
         text = data.get('text')
         
         if not text:
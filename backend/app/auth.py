@@ -1,11 +1,18 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import User
+from app.password_hashing import PasswordHashingBusy
+from app.subscriptions import Subscription, issue_access_token
 import re
 
 auth_bp = Blueprint('auth', __name__)
 
+def _hashing_busy_response(e):
+    response = jsonify({'error': 'We are handling a lot of sign-ins right now. Please try again in a moment.'})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     try:
@@ -39,7 +46,7 @@ def register():
         db.session.commit()
         
         # Create token
-        access_token = create_access_token(identity=str(user.id))
+        access_token = issue_access_token(user.id, Subscription.of(user))
         
         return jsonify({
             'message': 'Account created successfully! Welcome to MindWell!',
@@ -51,6 +58,8 @@ def register():
             }
         }), 201
         
+    except PasswordHashingBusy as e:
+        return _hashing_busy_response(e)
     except Exception as e:
         return jsonify({'error': 'Something went wrong while creating your account. Please try again.'}), 500
 
@@ -72,8 +81,16 @@ def login():
         if not user or not user.check_password(password):
             return jsonify({'error': 'Invalid username/email or password. Please check your credentials and try again.'}), 401
         
+        # Upgrade hashes made with an older cost factor while we have the plaintext
+        if user.password_needs_rehash():
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except PasswordHashingBusy:
+                pass  # keep the old hash; it is upgraded on a later login
+        
         # Create token
-        access_token = create_access_token(identity=str(user.id))
+        access_token = issue_access_token(user.id, Subscription.of(user))
         
         return jsonify({
             'message': 'Welcome back to MindWell!',
@@ -85,6 +102,8 @@ def login():
             }
         })
         
+    except PasswordHashingBusy as e:
+        return _hashing_busy_response(e)
     except Exception as e:
         return jsonify({'error': 'Something went wrong while signing you in. Please try again.'}), 500
 
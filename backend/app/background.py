@@ -0,0 +1,57 @@
+import os
+import threading
+
+class PeriodicWorker:
+    """Daemon thread that runs a task inside an app context every `interval` seconds.
+
+    `wake()` runs the task early. Threads do not survive fork, so `start()` is
+    called lazily from request handlers and restarts the thread in each new process.
+    """
+
+    def __init__(self, name, task, interval):
+        self.name = name
+        self.task = task
+        self.interval = interval
+        self.runs = 0
+        self.failures = 0
+        self._app = None
+        self._thread = None
+        self._pid = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self, app):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._app = app
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            with self._app.app_context():
+                try:
+                    self.task()
+                    self.runs += 1
+                except Exception as e:
+                    self.failures += 1
+                    self._app.logger.error(f"{self.name} failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stats(self):
+        return {'running': self.is_running(), 'runs': self.runs, 'failures': self.failures}
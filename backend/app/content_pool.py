@@ -0,0 +1,144 @@
+import json
+import threading
+from flask import current_app
+from app import db
+from app.background import PeriodicWorker
+from app.leases import acquire_lease, release_lease
+from app.models import GeneratedContent
+from app.openai_client import chat_completion
+from app.stats import register_stats
+from config import Config
+
+AFFIRMATION = 'affirmation'
+JOURNAL_PROMPT = 'journal_prompt'
+
+# (kind, mood bucket) pairs kept stocked; bucket 0 serves requests without a mood
+POOLS = [(AFFIRMATION, 0)] + [(JOURNAL_PROMPT, mood) for mood in range(0, 6)]
+
+# Items requested per completion while refilling
+GENERATE_PER_CALL = 10
+# Refills run off the request path, so they can wait longer than interactive calls
+GENERATE_TIMEOUT = 60
+
+# Only one process refills at a time. The lease is renewed before every
+# completion, so it only has to outlast one call and its retries
+REFILL_LEASE = 'content-pool-refill'
+REFILL_LEASE_SECONDS = 300
+
+AFFIRMATION_SYSTEM_PROMPT = "You are a supportive wellness coach. Generate a positive, encouraging affirmation for mental wellness. Keep it under 50 words and make it personal and uplifting."
+JOURNAL_PROMPT_SYSTEM_PROMPT = "You are a therapeutic writing coach. Generate a thoughtful journal prompt for mental wellness and self-reflection.{mood_context} Make it encouraging and introspective, under 100 words."
+
+_counters = {'served': 0, 'empty': 0, 'generated': 0, 'refill_errors': 0, 'refills_skipped': 0}
+_counters_lock = threading.Lock()
+
+def _count(name, amount=1):
+    with _counters_lock:
+        _counters[name] += amount
+
+def mood_bucket(mood):
+    return mood if mood in range(1, 6) else 0
+
+def system_prompt(kind, mood=0):
+    if kind == AFFIRMATION:
+        return AFFIRMATION_SYSTEM_PROMPT
+    mood_context = f" The user's current mood is {mood}/5." if mood else ""
+    return JOURNAL_PROMPT_SYSTEM_PROMPT.format(mood_context=mood_context)
+
+def _pool_query(kind, mood):
+    return GeneratedContent.query.filter_by(kind=kind, mood=mood)
+
+def take_from_pool(kind, mood=0):
+    """Pop the oldest pre-generated item from a pool, or None when the pool is empty"""
+    if current_app.config.get('CONTENT_POOL_REFILL_ENABLED', Config.CONTENT_POOL_REFILL_ENABLED):
+        refiller.start(current_app._get_current_object())
+
+    item = _pool_query(kind, mood).order_by(GeneratedContent.id).first()
+    if item is None:
+        _count('empty')
+        refiller.wake()
+        return None
+
+    # Concurrent requests may read the same row; the loser simply serves a duplicate
+    text = item.text
+    GeneratedContent.query.filter_by(id=item.id).delete(synchronize_session=False)
+    db.session.commit()
+    _count('served')
+
+    # Wake the refiller once the pool no longer has low-water-mark items left
+    low_water = current_app.config.get('CONTENT_POOL_LOW_WATER', Config.CONTENT_POOL_LOW_WATER)
+    remaining = db.session.query(GeneratedContent.id)\
+        .filter_by(kind=kind, mood=mood)\
+        .order_by(GeneratedContent.id)\
+        .offset(low_water - 1).limit(1).scalar()
+    if remaining is None:
+        refiller.wake()
+
+    return text
+
+def generate_content(kind, mood, count):
+    """Ask OpenAI for `count` distinct items for a pool"""
+    noun = 'affirmations' if kind == AFFIRMATION else 'journal prompts'
+    content = chat_completion(
+        messages=[
+            {"role": "system", "content": system_prompt(kind, mood)},
+            {"role": "user", "content": f"Generate {count} different {noun}. Respond with only a JSON array of strings."}
+        ],
+        max_tokens=150 * count,
+        temperature=0.9,
+        timeout=GENERATE_TIMEOUT
+    )
+
+    items = json.loads(content[content.index('['):content.rindex(']') + 1])
+    return [item.strip() for item in items if isinstance(item, str) and item.strip()]
+
+def _refill_pool(kind, mood, low_water, high_water):
+    available = _pool_query(kind, mood).count()
+    if available >= low_water:
+        return
+
+    needed = high_water - available
+    while needed > 0:
+        if not acquire_lease(REFILL_LEASE, REFILL_LEASE_SECONDS):
+            return
+        items = generate_content(kind, mood, min(needed, GENERATE_PER_CALL))
+        if not items:
+            break
+        db.session.add_all(GeneratedContent(kind=kind, mood=mood, text=item) for item in items)
+        db.session.commit()
+        _count('generated', len(items))
+        needed -= len(items)
+
+def refill_pools():
+    """Top up every pool that has fallen below the low-water mark to the high-water mark.
+
+    Every worker process runs a refiller, so the work is guarded by a lease:
+    while one process refills, the others skip their turn instead of reading
+    the same counts and generating the same shortfall again.
+    """
+    low_water = current_app.config.get('CONTENT_POOL_LOW_WATER', Config.CONTENT_POOL_LOW_WATER)
+    high_water = current_app.config.get('CONTENT_POOL_HIGH_WATER', Config.CONTENT_POOL_HIGH_WATER)
+
+    if not acquire_lease(REFILL_LEASE, REFILL_LEASE_SECONDS):
+        _count('refills_skipped')
+        return
+    try:
+        for kind, mood in POOLS:
+            # One failed generation should not leave the remaining pools empty
+            try:
+                _refill_pool(kind, mood, low_water, high_water)
+            except Exception as e:
+                db.session.rollback()
+                _count('refill_errors')
+                current_app.logger.error(f"Refilling the {kind} pool (mood {mood}) failed: {e}")
+    finally:
+        release_lease(REFILL_LEASE)
+
+refiller = PeriodicWorker('content-pool-refiller', refill_pools, interval=Config.CONTENT_POOL_REFILL_INTERVAL)
+
+def content_pool_stats():
+    with _counters_lock:
+        stats = dict(_counters)
+    stats['refiller'] = refiller.stats()
+    return stats
+
+register_stats('content_pool', content_pool_stats)
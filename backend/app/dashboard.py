@@ -1,9 +1,12 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
-from app.models import Mood, Journal, Habit, HabitLog
+from app.models import Mood, Journal
+from app.habits import get_habits_with_progress
+from app.mood import get_daily_rollups
+from app.query_stats import get_query_count
+from app.dashboard_cache import cache_summary, dashboard_version, get_cached_summary
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy.orm import defer
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -13,79 +16,86 @@ def get_dashboard_summary():
     try:
         user_id = int(get_jwt_identity())
         today = datetime.utcnow().date()
+        today_start = datetime.combine(today, datetime.min.time())
         week_ago = datetime.utcnow() - timedelta(days=7)
         
-        # Mood data for the last 7 days
-        mood_data = db.session.query(
-            func.date(Mood.created_at).label('date'),
-            func.avg(Mood.mood).label('avg_mood')
-        ).filter(
-            Mood.user_id == user_id,
-            Mood.created_at >= week_ago
-        ).group_by(func.date(Mood.created_at)).all()
+        # One primary-key read decides whether this worker's cached summary is current
+        version = dashboard_version(user_id)
+        summary = get_cached_summary(user_id, today, version)
+        if summary is None:
+            summary = _build_summary(user_id, today_start, week_ago)
+            cache_summary(user_id, today, version, summary)
         
-        mood_trends = [{
-            'date': str(item.date),
-            'mood': round(item.avg_mood, 2)
-        } for item in mood_data]
+        # Expose the query count in debug mode so per-habit query regressions show up
+        if current_app.debug:
+            summary = dict(summary, debug={'query_count': get_query_count()})
         
-        # Today's mood
-        todays_mood = Mood.query.filter(
-            Mood.user_id == user_id,
-            Mood.created_at >= datetime.combine(today, datetime.min.time())
-        ).order_by(Mood.created_at.desc()).first()
+        return jsonify(summary)
         
-        # Recent journal entries
-        recent_entries = Journal.query.filter_by(user_id=user_id)\
-            .order_by(Journal.created_at.desc())\
-            .limit(3).all()
-        
-        entries_preview = [{
-            'id': entry.id,
-            'title': entry.title,
-            'content': entry.content[:100] + '...' if len(entry.content) > 100 else entry.content,
-            'sentiment': entry.sentiment,
-            'created_at': entry.created_at.isoformat()
-        } for entry in recent_entries]
-        
-        # Habit progress
-        habits = Habit.query.filter_by(user_id=user_id).all()
-        habit_progress = []
-        
-        for habit in habits:
-            today_logs = HabitLog.query.filter(
-                HabitLog.habit_id == habit.id,
-                HabitLog.logged_at >= datetime.combine(today, datetime.min.time())
-            ).all()
-            
-            progress = sum(log.value for log in today_logs)
-            percentage = min((progress / habit.goal) * 100, 100) if habit.goal > 0 else 0
-            
-            habit_progress.append({
-                'id': habit.id,
-                'name': habit.name,
-                'progress': progress,
-                'goal': habit.goal,
-                'unit': habit.unit,
-                'percentage': round(percentage, 1),
-                'completed': progress >= habit.goal
-            })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _build_summary(user_id, today_start, week_ago):
+    """Build the dashboard payload from a fixed number of queries"""
+    # Mood data for the last 7 days, read from the daily rollup
+    mood_data = get_daily_rollups(user_id, week_ago.date())
+    
+    mood_trends = [{
+        'date': str(item.date),
+        'mood': round(item.mood_sum / item.mood_count, 2)
+    } for item in mood_data if item.mood_count]
+    
+    # Today's mood
+    todays_mood = Mood.query.filter(
+        Mood.user_id == user_id,
+        Mood.created_at >= today_start
+    ).order_by(Mood.created_at.desc()).first()
+    
+    # Recent journal entries
+    recent_entries = Journal.query.filter_by(user_id=user_id)\
+        .options(defer(Journal.content))\
+        .order_by(Journal.created_at.desc())\
+        .limit(3).all()
+    
+    entries_preview = [{
+        'id': entry.id,
+        'title': entry.title,
+        'content': entry.preview(100),
+        'sentiment': entry.sentiment,
+        'created_at': entry.created_at.isoformat()
+    } for entry in recent_entries]
+    
+    # Habit progress, summed for all habits in a single grouped query
+    habits = get_habits_with_progress(user_id, today_start)
+    habit_progress = []
+    
+    for habit, progress in habits:
+        percentage = min((progress / habit.goal) * 100, 100) if habit.goal > 0 else 0
         
-        return jsonify({
-            'mood_trends': mood_trends,
-            'todays_mood': {
-                'mood': todays_mood.mood if todays_mood else None,
-                'notes': todays_mood.notes if todays_mood else None,
-                'logged_at': todays_mood.created_at.isoformat() if todays_mood else None
-            },
-            'recent_entries': entries_preview,
-            'habit_progress': habit_progress,
-            'stats': {
-                'total_entries': len(recent_entries),
-                'active_habits': len(habits),
-                'completed_habits_today': sum(1 for h in habit_progress if h['completed'])
-            }
+        habit_progress.append({
+            'id': habit.id,
+            'name': habit.name,
+            'progress': progress,
+            'goal': habit.goal,
+            'unit': habit.unit,
+            'percentage': round(percentage, 1),
+            'completed': progress >= habit.goal
         })
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+    
+    summary = {
+        'mood_trends': mood_trends,
+        'todays_mood': {
+            'mood': todays_mood.mood if todays_mood else None,
+            'notes': todays_mood.notes if todays_mood else None,
+            'logged_at': todays_mood.created_at.isoformat() if todays_mood else None
+        },
+        'recent_entries': entries_preview,
+        'habit_progress': habit_progress,
+        'stats': {
+            'total_entries': len(recent_entries),
+            'active_habits': len(habits),
+            'completed_habits_today': sum(1 for h in habit_progress if h['completed'])
+        }
+    }
+    
+    return summary
@@ -0,0 +1,50 @@
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.cache import LRUCache
+from app.models import DashboardVersion
+from app.stats import register_stats
+from config import Config
+
+# Summary payloads keyed by (user_id, UTC date, dashboard version). Each worker
+# process keeps its own copy; the version lives in the database, so a write
+# handled by any worker makes every worker's older entry unreachable.
+summary_cache = LRUCache(
+    max_entries=Config.DASHBOARD_CACHE_MAX_ENTRIES,
+    ttl=Config.DASHBOARD_CACHE_TTL
+)
+
+register_stats('dashboard_cache', summary_cache.stats)
+
+def dashboard_version(user_id):
+    """The user's current dashboard version, 0 before their first write"""
+    with db.engine.connect() as conn:
+        version = conn.execute(
+            select(DashboardVersion.version).where(DashboardVersion.user_id == user_id)
+        ).scalar()
+    return version or 0
+
+def get_cached_summary(user_id, day, version):
+    return summary_cache.get((user_id, day.isoformat(), version))
+
+def cache_summary(user_id, day, version, summary):
+    summary_cache.set((user_id, day.isoformat(), version), summary)
+
+def invalidate_dashboard_summary(user_id):
+    """Bump the user's dashboard version after a committed write, in every process at once"""
+    bump = update(DashboardVersion)\
+        .where(DashboardVersion.user_id == user_id)\
+        .values(version=DashboardVersion.version + 1)
+    # Own transaction, so the caller's session is never committed here
+    with db.engine.begin() as conn:
+        bumped = conn.execute(bump).rowcount
+    if not bumped:
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(insert(DashboardVersion).values(user_id=user_id, version=1))
+        except IntegrityError:
+            # A concurrent write created the row first
+            with db.engine.begin() as conn:
+                conn.execute(bump)
+    # Entries under older versions can no longer be hit; free them here right away
+    summary_cache.delete_matching(lambda key: key[0] == user_id)
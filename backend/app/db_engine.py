@@ -0,0 +1,113 @@
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from app.stats import LatencyWindow, register_stats
+from config import Config
+
+_counters = {'checkouts': 0, 'timeouts': 0, 'connects': 0, 'invalidated': 0}
+_counters_lock = threading.Lock()
+# Time spent in the pool per checkout: waiting for a free connection, or opening an overflow one
+_checkout_waits = LatencyWindow()
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            _count('timeouts')
+            raise
+        finally:
+            _checkout_waits.record(time.perf_counter() - start)
+            _count('checkouts')
+
+def _is_memory_sqlite(url):
+    return url.database in (None, '', ':memory:')
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the database backend in `uri`.
+
+    Server databases (MySQL via PyMySQL on Railway) get a sized pool that pings
+    connections before use and recycles them before the server's idle timeout.
+    File SQLite keeps SQLAlchemy's pool sizes; in-memory SQLite is left to
+    Flask-SQLAlchemy, which needs a single shared connection for it.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        if _is_memory_sqlite(url):
+            return {}
+        return {'poolclass': TimedQueuePool}
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': Config.DB_POOL_SIZE,
+        'max_overflow': Config.DB_MAX_OVERFLOW,
+        'pool_timeout': Config.DB_POOL_TIMEOUT,
+        'pool_recycle': Config.DB_POOL_RECYCLE,
+        'pool_pre_ping': Config.DB_POOL_PRE_PING,
+    }
+
+def configure_engine_options(app):
+    """Fill in the engine profile for the configured database before db.init_app()"""
+    options = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL lets readers proceed while a write is in progress; NORMAL skips the
+        # per-commit fsync, which WAL makes safe against corruption
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+    finally:
+        cursor.close()
+
+def _count_connect(dbapi_connection, connection_record):
+    _count('connects')
+
+def _count_invalidate(dbapi_connection, connection_record, exception):
+    # Includes connections that failed the pre-ping and were replaced
+    _count('invalidated')
+
+def install_engine_events(engine):
+    """Attach the pragmas and pool counters to an engine created by db.init_app()"""
+    if engine.dialect.name == 'sqlite' and not _is_memory_sqlite(engine.url) and Config.SQLITE_WAL:
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+    event.listen(engine, 'connect', _count_connect)
+    event.listen(engine, 'invalidate', _count_invalidate)
+
+def dispose_engines_after_fork(app):
+    """Give a freshly forked worker empty pools.
+
+    Pooled connections opened before fork would be shared with the parent and
+    every sibling; close=False drops them without closing the parent's sockets.
+    """
+    from app import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def pool_stats():
+    from app import db
+    pool = db.engine.pool
+    with _counters_lock:
+        stats = dict(_counters)
+    stats['pool'] = type(pool).__name__
+    if isinstance(pool, QueuePool):
+        stats['size'] = pool.size()
+        stats['checked_out'] = pool.checkedout()
+        stats['checked_in'] = pool.checkedin()
+        # Negative while the pool is still below pool_size
+        stats['overflow'] = pool.overflow()
+    stats['checkout_wait_ms'] = _checkout_waits.summary()
+    return stats
+
+register_stats('db_pool', pool_stats)
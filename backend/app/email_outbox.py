@@ -0,0 +1,283 @@
+import os
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email import message_from_string, policy
+from flask import current_app
+from sqlalchemy import event
+from app import db
+from app.background import PeriodicWorker
+from app.metrics import record_external_call
+from app.models import EmailOutbox
+from app.stats import LatencyWindow, register_stats
+from config import Config
+
+_counters = {'queued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'connections_opened': 0, 'connections_discarded': 0}
+_counters_lock = threading.Lock()
+_send_latencies = LatencyWindow()
+
+# A claimed row is 'sending' until this many seconds after the claim; if its
+# process dies mid-batch, another sweep picks it up once the claim lapses
+CLAIM_SECONDS = 300
+
+def _count(name, amount=1):
+    with _counters_lock:
+        _counters[name] += amount
+
+class SMTPPool:
+    """Authenticated SMTP connections kept open between batches.
+
+    Idle connections older than SMTP_IDLE_TIMEOUT are closed rather than reused,
+    and the rest are checked with NOOP before each use, so a server-side timeout
+    costs a reconnect instead of a failed send.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._idle = []  # (connection, last used monotonic time)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        connection = smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT, timeout=Config.SMTP_TIMEOUT)
+        try:
+            if Config.SMTP_USE_TLS:
+                connection.starttls()
+            if Config.SMTP_USERNAME:
+                connection.login(Config.SMTP_USERNAME, Config.SMTP_PASSWORD)
+        except Exception:
+            _close(connection)
+            raise
+        _count('connections_opened')
+        return connection
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, last_used = self._idle.pop()
+            if time.monotonic() - last_used < Config.SMTP_IDLE_TIMEOUT:
+                try:
+                    if connection.noop()[0] == 250:
+                        return connection
+                except (smtplib.SMTPException, OSError):
+                    pass
+            self.discard(connection)
+        return self._connect()
+
+    def release(self, connection):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        _close(connection)
+
+    def discard(self, connection):
+        _count('connections_discarded')
+        _close(connection)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            _close(connection)
+
+    def idle_count(self):
+        with self._lock:
+            return len(self._idle)
+
+def _close(connection):
+    try:
+        connection.quit()
+    except (smtplib.SMTPException, OSError):
+        connection.close()
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """The process-wide SMTP pool; sockets are not shared across fork"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = SMTPPool(Config.SMTP_POOL_SIZE)
+            _pool_pid = os.getpid()
+        return _pool
+
+def enqueue_email(msg):
+    """Add a rendered email.message.EmailMessage to the outbox in the caller's transaction.
+
+    Nothing is committed here: the email is queued when, and only if, the
+    caller commits, so it never goes out for work that was rolled back.
+    """
+    session = db.session()
+    session.add(EmailOutbox(to_address=msg['To'], subject=msg['Subject'], message=msg.as_string()))
+    _count('queued')
+    event.listen(session, 'after_commit', _wake_outbox_worker, once=True)
+
+def _wake_outbox_worker(session):
+    outbox_worker.wake()
+
+def _deliver_smtp(message):
+    """Send one raw message over a pooled connection; raises on failure"""
+    msg = message_from_string(message, policy=policy.SMTP)
+    pool = get_pool()
+    connection = pool.acquire()
+    start = time.perf_counter()
+    failed = True
+    try:
+        connection.send_message(msg)
+        failed = False
+    except smtplib.SMTPServerDisconnected:
+        pool.discard(connection)
+        raise
+    except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+        # The server rejected this message; reset the transaction and keep the connection.
+        # SMTP errors subclass OSError, so this must come before the handler below
+        try:
+            connection.rset()
+        except (smtplib.SMTPException, OSError):
+            pool.discard(connection)
+        else:
+            pool.release(connection)
+        raise
+    except (smtplib.SMTPException, OSError):
+        pool.discard(connection)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _send_latencies.record(elapsed)
+        record_external_call('smtp', elapsed, failed)
+    pool.release(connection)
+
+def _deliver_console(message):
+    """Print the email instead of sending it (development)"""
+    msg = message_from_string(message, policy=policy.default)
+    print("=== EMAIL ===")
+    print(f"To: {msg['To']}")
+    print(f"Subject: {msg['Subject']}")
+    print(msg.get_body(preferencelist=('plain',)).get_content())
+    print("=============")
+
+BACKENDS = {'smtp': _deliver_smtp, 'console': _deliver_console}
+
+def _attempt(deliver, message):
+    try:
+        deliver(message)
+        return None
+    except Exception as e:
+        return e
+
+def _retry_delay(attempts):
+    """Full-jitter exponential backoff after the given number of failed attempts"""
+    return random.uniform(0, Config.EMAIL_RETRY_BACKOFF * 2 ** (attempts - 1))
+
+def _claim_due_rows(batch_size):
+    """Mark up to batch_size due rows as 'sending' for this sweep and commit.
+
+    Each row is claimed with its own conditional UPDATE, so when several
+    processes sweep at once every row goes to exactly one of them, on SQLite
+    as well as MySQL. Returns (id, message, attempts, to_address) tuples.
+    """
+    now = datetime.utcnow()
+    claim_until = now + timedelta(seconds=CLAIM_SECONDS)
+    due = (EmailOutbox.status.in_(('pending', 'sending')), EmailOutbox.next_attempt_at <= now)
+    candidates = db.session.query(EmailOutbox.id)\
+        .filter(*due)\
+        .order_by(EmailOutbox.next_attempt_at)\
+        .limit(batch_size).all()
+
+    claimed = []
+    for (row_id,) in candidates:
+        if EmailOutbox.query.filter(EmailOutbox.id == row_id, *due)\
+                .update({'status': 'sending', 'next_attempt_at': claim_until}, synchronize_session=False):
+            claimed.append(row_id)
+    rows = []
+    if claimed:
+        rows = db.session.query(EmailOutbox.id, EmailOutbox.message, EmailOutbox.attempts, EmailOutbox.to_address)\
+            .filter(EmailOutbox.id.in_(claimed)).all()
+    db.session.commit()
+    return rows, len(candidates)
+
+def _record_result(row_id, attempts, to_address, error):
+    """The column values that record one send attempt"""
+    attempts += 1
+    if error is None:
+        _count('sent')
+        return {'status': 'sent', 'attempts': attempts, 'sent_at': datetime.utcnow(), 'last_error': None}
+
+    if isinstance(error, smtplib.SMTPRecipientsRefused) or attempts >= Config.EMAIL_MAX_ATTEMPTS:
+        _count('failed')
+        current_app.logger.error(f"Email {row_id} to {to_address} failed after {attempts} attempts: {error}")
+        return {'status': 'failed', 'attempts': attempts, 'last_error': str(error)}
+
+    _count('retried')
+    current_app.logger.warning(f"Email {row_id} to {to_address} failed (attempt {attempts}): {error}")
+    return {
+        'status': 'pending',
+        'attempts': attempts,
+        'last_error': str(error),
+        'next_attempt_at': datetime.utcnow() + timedelta(seconds=_retry_delay(attempts)),
+    }
+
+def send_pending_emails(batch_size=None):
+    """Deliver due outbox rows, up to SMTP_POOL_SIZE at a time.
+
+    Rows are claimed and committed first, sent with no transaction open, and
+    their results recorded in a second transaction. A failed send is retried
+    with exponential backoff until EMAIL_MAX_ATTEMPTS, then marked failed;
+    refused recipients fail immediately. Returns the number of rows attempted.
+    """
+    batch_size = batch_size or Config.EMAIL_OUTBOX_BATCH_SIZE
+    deliver = BACKENDS[Config.EMAIL_BACKEND]
+    total = 0
+    with ThreadPoolExecutor(max_workers=max(1, Config.SMTP_POOL_SIZE), thread_name_prefix='email-send') as executor:
+        while True:
+            rows, candidates = _claim_due_rows(batch_size)
+            if not candidates:
+                break
+
+            # Sessions are not thread-safe; only the raw messages go to the sender threads
+            errors = list(executor.map(_attempt, [deliver] * len(rows), [row.message for row in rows]))
+            for row, error in zip(rows, errors):
+                EmailOutbox.query.filter_by(id=row.id, status='sending')\
+                    .update(_record_result(row.id, row.attempts, row.to_address, error), synchronize_session=False)
+            db.session.commit()
+
+            total += len(rows)
+            if candidates < batch_size:
+                break
+    return total
+
+outbox_worker = PeriodicWorker('email-outbox', send_pending_emails, interval=Config.EMAIL_OUTBOX_INTERVAL)
+
+def install_email_outbox_worker(app):
+    """Send queued email on a background thread in each worker process that serves requests"""
+    if not app.config.get('EMAIL_OUTBOX_WORKER_ENABLED'):
+        return
+
+    @app.before_request
+    def start_email_outbox_worker():
+        if not outbox_worker.is_running():
+            outbox_worker.start(app)
+
+def email_outbox_stats():
+    with _counters_lock:
+        stats = dict(_counters)
+
+    pending = EmailOutbox.query.filter(EmailOutbox.status == 'pending')
+    due = pending.order_by(EmailOutbox.next_attempt_at).with_entities(EmailOutbox.next_attempt_at).first()
+    stats['pending'] = pending.count()
+    stats['sending'] = EmailOutbox.query.filter(EmailOutbox.status == 'sending').count()
+    # Outbox lag: how long the most overdue email has been waiting for the worker
+    stats['lag_seconds'] = round(max(0.0, (datetime.utcnow() - due.next_attempt_at).total_seconds()), 1) if due else 0.0
+    stats['idle_connections'] = get_pool().idle_count()
+    stats['send_ms'] = _send_latencies.summary()
+    stats['worker'] = outbox_worker.stats()
+    return stats
+
+register_stats('email_outbox', email_outbox_stats)
@@ -1,11 +1,34 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app.dashboard_cache import invalidate_dashboard_summary
 from app.models import Habit, HabitLog
 from datetime import datetime, timedelta
+from sqlalchemy import func
 
 habits_bp = Blueprint('habits', __name__)
 
+def get_habits_with_progress(user_id, since):
+    """Return (habit, progress) pairs for a user, summing log values since the given time in one query"""
+    progress = db.session.query(
+        HabitLog.habit_id.label('habit_id'),
+        func.sum(HabitLog.value).label('progress')
+    ).filter(
+        HabitLog.user_id == user_id,
+        HabitLog.logged_at >= since
+    ).group_by(HabitLog.habit_id).subquery()
+    
+    rows = db.session.query(
+        Habit,
+        func.coalesce(progress.c.progress, 0)
+    ).outerjoin(
+        progress, progress.c.habit_id == Habit.id
+    ).filter(
+        Habit.user_id == user_id
+    ).order_by(Habit.created_at.desc()).all()
+    
+    return [(habit, int(value)) for habit, value in rows]
+
 @habits_bp.route('/create', methods=['POST'])
 @jwt_required()
 def create_habit():
@@ -33,6 +56,7 @@ def create_habit():
         
         db.session.add(habit)
         db.session.commit()
+        invalidate_dashboard_summary(user_id)
         
         return jsonify({
             'message': 'Habit created successfully',
@@ -56,18 +80,12 @@ def get_habits():
     try:
         user_id = int(get_jwt_identity())
         
-        habits = Habit.query.filter_by(user_id=user_id).order_by(Habit.created_at.desc()).all()
+        # Habits with today's progress
+        today = datetime.utcnow().date()
+        habits = get_habits_with_progress(user_id, datetime.combine(today, datetime.min.time()))
         
         habit_list = []
-        for habit in habits:
-            # Get today's progress
-            today = datetime.utcnow().date()
-            today_logs = HabitLog.query.filter(
-                HabitLog.habit_id == habit.id,
-                HabitLog.logged_at >= datetime.combine(today, datetime.min.time())
-            ).all()
-            
-            progress = sum(log.value for log in today_logs)
+        for habit, progress in habits:
             completed = progress >= habit.goal
             
             habit_list.append({
@@ -114,6 +132,7 @@ def log_habit():
         
         db.session.add(habit_log)
         db.session.commit()
+        invalidate_dashboard_summary(user_id)
         
         return jsonify({
             'message': 'Habit progress logged successfully',
@@ -1,11 +1,45 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app.dashboard_cache import invalidate_dashboard_summary
 from app.models import Journal
-from app.ai_integration import analyze_sentiment
+from app.sentiment_worker import PENDING, schedule_sentiment
+from app.search import index_entry, search_available, search_entries, search_terms
+from datetime import datetime
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import defer
+import base64
 
 journal_bp = Blueprint('journal', __name__)
 
+MAX_PER_PAGE = 50
+
+def encode_cursor(entry):
+    """Opaque cursor pointing just past the given entry"""
+    raw = f'{entry.created_at.isoformat()},{entry.id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from a cursor, raising ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, entry_id = raw.rsplit(',', 1)
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except (UnicodeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+def sentiment_status(entry):
+    return 'pending' if entry.sentiment == PENDING else 'complete'
+
+def serialize_preview(entry):
+    return {
+        'id': entry.id,
+        'title': entry.title,
+        'content': entry.preview(),
+        'sentiment': entry.sentiment,
+        'created_at': entry.created_at.isoformat()
+    }
+
 @journal_bp.route('/entry', methods=['POST'])
 @jwt_required()
 def create_entry():
@@ -19,18 +53,21 @@ def create_entry():
         if not title or not content:
             return jsonify({'error': 'Title and content are required'}), 400
         
-        # Analyze sentiment using AI
-        sentiment = analyze_sentiment(content)
-        
+        # Sentiment is filled in by a background worker once the entry is saved
         entry = Journal(
             user_id=user_id,
             title=title,
             content=content,
-            sentiment=sentiment
+            sentiment=PENDING
         )
         
         db.session.add(entry)
+        db.session.flush()
+        index_entry(entry)
         db.session.commit()
+        invalidate_dashboard_summary(user_id)
+        
+        schedule_sentiment(entry.id)
         
         return jsonify({
             'message': 'Journal entry created successfully',
@@ -39,6 +76,7 @@ def create_entry():
                 'title': entry.title,
                 'content': entry.content,
                 'sentiment': entry.sentiment,
+                'sentiment_status': sentiment_status(entry),
                 'created_at': entry.created_at.isoformat()
             }
         }), 201
@@ -51,20 +89,20 @@ def create_entry():
 def get_entries():
     try:
         user_id = int(get_jwt_identity())
+        
+        if 'cursor' in request.args:
+            return _get_entries_after_cursor(user_id, request.args.get('cursor'))
+        
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        per_page = min(request.args.get('per_page', 10, type=int), MAX_PER_PAGE)
         
+        # The full content is only loaded by /entry/<id>
         entries = Journal.query.filter_by(user_id=user_id)\
+            .options(defer(Journal.content))\
             .order_by(Journal.created_at.desc())\
             .paginate(page=page, per_page=per_page, error_out=False)
         
-        entry_list = [{
-            'id': entry.id,
-            'title': entry.title,
-            'content': entry.content[:200] + '...' if len(entry.content) > 200 else entry.content,
-            'sentiment': entry.sentiment,
-            'created_at': entry.created_at.isoformat()
-        } for entry in entries.items]
+        entry_list = [serialize_preview(entry) for entry in entries.items]
         
         return jsonify({
             'entries': entry_list,
@@ -76,6 +114,63 @@ def get_entries():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _get_entries_after_cursor(user_id, cursor):
+    """Keyset pagination: no COUNT(*) and no OFFSET, so deep pages cost the same as the first"""
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_PER_PAGE)
+    
+    query = Journal.query.filter(Journal.user_id == user_id)\
+        .options(defer(Journal.content))
+    
+    if cursor:
+        try:
+            created_at, entry_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(or_(
+            Journal.created_at < created_at,
+            and_(Journal.created_at == created_at, Journal.id < entry_id)
+        ))
+    
+    # Fetch one extra row to know whether another page exists
+    entries = query.order_by(Journal.created_at.desc(), Journal.id.desc())\
+        .limit(limit + 1).all()
+    
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    
+    return jsonify({
+        'entries': [serialize_preview(entry) for entry in entries],
+        'next_cursor': encode_cursor(entries[-1]) if has_more else None,
+        'limit': limit
+    })
+
+@journal_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    try:
+        user_id = int(get_jwt_identity())
+        query = request.args.get('q', '')
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), MAX_PER_PAGE)
+        
+        if not search_terms(query):
+            return jsonify({'error': 'Search query is required'}), 400
+        
+        if not search_available():
+            return jsonify({'error': 'Search index is not initialised. Run python init_db.py'}), 503
+        
+        results, has_more = search_entries(user_id, query, per_page, (page - 1) * per_page)
+        
+        return jsonify({
+            'results': results,
+            'current_page': page,
+            'per_page': per_page,
+            'has_more': has_more
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @journal_bp.route('/entry/<int:entry_id>', methods=['GET'])
 @jwt_required()
 def get_entry(entry_id):
@@ -93,9 +188,32 @@ def get_entry(entry_id):
                 'title': entry.title,
                 'content': entry.content,
                 'sentiment': entry.sentiment,
+                'sentiment_status': sentiment_status(entry),
                 'created_at': entry.created_at.isoformat()
             }
         })
         
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@journal_bp.route('/entry/<int:entry_id>/sentiment', methods=['GET'])
+@jwt_required()
+def get_entry_sentiment(entry_id):
+    """Poll endpoint for the background sentiment analysis of an entry"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        entry = Journal.query.with_entities(Journal.id, Journal.sentiment)\
+            .filter_by(id=entry_id, user_id=user_id).first()
+        
+        if not entry:
+            return jsonify({'error': 'Entry not found'}), 404
+        
+        return jsonify({
+            'id': entry.id,
+            'sentiment': entry.sentiment,
+            'status': sentiment_status(entry)
+        })
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,45 @@
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import JobLease
+
+def lease_holder():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def acquire_lease(name, seconds):
+    """Take the named lease, or extend it if this process already holds it.
+
+    Returns False while another process holds an unexpired lease. Runs on its
+    own connection, so it never commits the caller's transaction.
+    """
+    holder = lease_holder()
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=seconds)
+    with db.engine.begin() as conn:
+        # A single conditional UPDATE, so two processes cannot both take an expired lease
+        taken = conn.execute(
+            update(JobLease)
+            .where(JobLease.name == name, or_(JobLease.holder == holder, JobLease.expires_at <= now))
+            .values(holder=holder, expires_at=expires_at)
+        ).rowcount
+    if taken:
+        return True
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(insert(JobLease).values(name=name, holder=holder, expires_at=expires_at))
+    except IntegrityError:
+        # The lease exists and someone else holds it
+        return False
+    return True
+
+def release_lease(name):
+    """Let other processes take the lease now instead of when it expires"""
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(JobLease)
+            .where(JobLease.name == name, JobLease.holder == lease_holder())
+            .values(expires_at=datetime.utcnow())
+        )
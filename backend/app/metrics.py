@@ -0,0 +1,245 @@
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from flask import Response, g, request
+from app.background import PeriodicWorker
+from app.query_stats import get_query_count, get_query_time
+from app.stats import require_ops_access
+from config import Config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+EXTERNAL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'mindwell_http_requests_total': ('counter', 'HTTP requests by route and status', None),
+    'mindwell_http_request_duration_seconds': (
+        'histogram', 'Time to handle the request, including any streamed body', LATENCY_BUCKETS),
+    'mindwell_http_requests_in_flight': ('gauge', 'Requests currently being handled', None),
+    'mindwell_db_queries_per_request': ('histogram', 'SQL statements executed per request', QUERY_COUNT_BUCKETS),
+    'mindwell_db_query_seconds_per_request': ('histogram', 'Time spent in SQL per request', LATENCY_BUCKETS),
+    'mindwell_external_call_duration_seconds': (
+        'histogram', 'Calls to OpenAI, Paystack and SMTP by outcome', EXTERNAL_BUCKETS),
+}
+
+# Process-local values keyed by (metric name, sorted label pairs). Histogram
+# values are [per-bucket counts..., +Inf count, sum], not yet cumulative.
+_values = {}
+_lock = threading.Lock()
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def inc(name, labels, amount=1):
+    key = _key(name, labels)
+    with _lock:
+        _values[key] = _values.get(key, 0) + amount
+
+def observe(name, labels, value):
+    buckets = METRICS[name][2]
+    key = _key(name, labels)
+    with _lock:
+        counts = _values.get(key)
+        if counts is None:
+            counts = _values[key] = [0] * (len(buckets) + 1) + [0.0]
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[len(buckets)] += 1
+        counts[-1] += value
+
+def record_external_call(service, seconds, failed):
+    """Time one call to an outside service (openai, paystack, smtp)"""
+    observe('mindwell_external_call_duration_seconds',
+            {'service': service, 'outcome': 'error' if failed else 'ok'}, seconds)
+
+def _snapshot():
+    with _lock:
+        return [[name, list(labels), list(value) if isinstance(value, list) else value]
+                for (name, labels), value in _values.items()]
+
+# Multi-process export: each process writes its values to METRICS_DIR/<pid>.json
+# and /metrics merges every file. Files of exited processes are folded into
+# _exited.json so their counts survive; their gauges are dropped.
+
+EXITED_FILE = '_exited.json'
+
+_flushed_pid = None
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+def _write(path, entries):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(entries, f)
+    os.replace(temporary, path)
+
+def _merge(total, entries, include_gauges=True):
+    for name, labels, value in entries:
+        if name not in METRICS or (METRICS[name][0] == 'gauge' and not include_gauges):
+            continue
+        key = (name, tuple(tuple(pair) for pair in labels))
+        current = total.get(key)
+        if current is None:
+            total[key] = list(value) if isinstance(value, list) else value
+        elif isinstance(value, list):
+            total[key] = [a + b for a, b in zip(current, value)]
+        else:
+            total[key] = current + value
+
+def _locked(directory):
+    lock = open(os.path.join(directory, '.lock'), 'a')
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    return lock
+
+def _fold_into_exited(directory, paths):
+    exited = {}
+    _merge(exited, _read(os.path.join(directory, EXITED_FILE)), include_gauges=False)
+    for path in paths:
+        _merge(exited, _read(path), include_gauges=False)
+    _write(os.path.join(directory, EXITED_FILE), [[name, list(labels), value] for (name, labels), value in exited.items()])
+    for path in paths:
+        os.remove(path)
+
+def flush_metrics():
+    """Write this process's values for /metrics in any worker to read"""
+    global _flushed_pid
+    directory = Config.METRICS_DIR
+    if not directory:
+        return
+    entries = _snapshot()
+    if not entries:
+        return
+    os.makedirs(directory, exist_ok=True)
+    pid = os.getpid()
+    path = os.path.join(directory, f'{pid}.json')
+    with _locked(directory):
+        # A file under our pid that we did not write belongs to an exited process
+        if _flushed_pid != pid and os.path.exists(path):
+            _fold_into_exited(directory, [path])
+        _write(path, entries)
+    _flushed_pid = pid
+
+def _collect():
+    directory = Config.METRICS_DIR
+    if not directory:
+        total = {}
+        _merge(total, _snapshot())
+        return total
+
+    flush_metrics()
+    total = {}
+    with _locked(directory):
+        names = [name for name in os.listdir(directory) if name.endswith('.json') and name != EXITED_FILE]
+        exited = [os.path.join(directory, name) for name in names if not _pid_alive(int(name[:-5]))]
+        if exited:
+            _fold_into_exited(directory, exited)
+        _merge(total, _read(os.path.join(directory, EXITED_FILE)), include_gauges=False)
+        for name in names:
+            path = os.path.join(directory, name)
+            if path not in exited:
+                _merge(total, _read(path))
+    return total
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_metrics():
+    """All processes' metrics in the Prometheus text exposition format"""
+    total = _collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, value) for (metric, labels), value in total.items() if metric == name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), value[:-1]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(float(bound))
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(float(value[-1]))}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+flusher = PeriodicWorker('metrics-flush', flush_metrics, interval=Config.METRICS_FLUSH_INTERVAL)
+
+def _route_labels():
+    rule = request.url_rule
+    return {
+        'blueprint': request.blueprint or '',
+        'endpoint': rule.endpoint if rule is not None else '<unmatched>',
+        'method': request.method,
+    }
+
+def install_metrics(app):
+    """Instrument every request and serve the merged metrics on /metrics"""
+    if not app.config.get('METRICS_ENABLED'):
+        return
+
+    @app.before_request
+    def start_request_metrics():
+        if Config.METRICS_DIR and not flusher.is_running():
+            flusher.start(app)
+        g.metrics_start = time.perf_counter()
+        inc('mindwell_http_requests_in_flight', {})
+
+    @app.after_request
+    def record_response_metrics(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exception=None):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        inc('mindwell_http_requests_in_flight', {}, -1)
+        labels = _route_labels()
+        status = g.pop('metrics_status', 500)
+        inc('mindwell_http_requests_total', dict(labels, status=str(status)))
+        observe('mindwell_http_request_duration_seconds', labels, time.perf_counter() - start)
+        observe('mindwell_db_queries_per_request', labels, get_query_count())
+        observe('mindwell_db_query_seconds_per_request', labels, get_query_time())
+
+    @app.route('/metrics')
+    @require_ops_access
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    # Keep the last few seconds of counts when a worker exits (e.g. max_requests)
+    atexit.register(flush_metrics)
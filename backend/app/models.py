@@ -1,14 +1,24 @@
 from datetime import datetime
 from app import db
-import bcrypt
+from sqlalchemy.orm import validates
+from app.password_hashing import hash_password, needs_rehash, verify_password
+
+# Length of the journal preview stored alongside each entry
+EXCERPT_LENGTH = 200
+
+def make_excerpt(content, length=EXCERPT_LENGTH):
+    return content[:length] + '...' if len(content) > length else content
 
 class User(db.Model):
+    # Serves the expiry sweep: premium rows whose expiry has passed
+    __table_args__ = (db.Index('ix_user_subscription_expiry', 'subscription_status', 'subscription_expires_at'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    subscription_status = db.Column(db.String(20), default='free')  # free, premium, cancelled
+    subscription_status = db.Column(db.String(20), default='free')  # free, premium, cancelled, expired
     subscription_expires_at = db.Column(db.DateTime, nullable=True)
     
     # Relationships
@@ -19,36 +29,102 @@ class User(db.Model):
     payments = db.relationship('Payment', backref='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return verify_password(password, self.password_hash)
+    
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
     
     def is_premium(self):
+        # Lapsed subscriptions are marked 'expired' in bulk by app.subscription_expiry
         if self.subscription_status != 'premium':
             return False
-        if self.subscription_expires_at and self.subscription_expires_at < datetime.utcnow():
-            self.subscription_status = 'expired'
-            db.session.commit()
-            return False
-        return True
+        return not self.subscription_expires_at or self.subscription_expires_at >= datetime.utcnow()
 
 class Mood(db.Model):
+    __table_args__ = (db.Index('ix_mood_user_created', 'user_id', 'created_at'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     mood = db.Column(db.Integer, nullable=False)  # 1-5 scale
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class MoodDaily(db.Model):
+    """Per-user daily mood rollup, maintained alongside Mood inserts"""
+    __table_args__ = (db.UniqueConstraint('user_id', 'date', name='uq_mood_daily_user_date'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)  # UTC day
+    mood_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    mood_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Histogram of entries per mood value
+    count_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    count_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    count_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    count_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    count_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
 class Journal(db.Model):
+    __table_args__ = (db.Index('ix_journal_user_created', 'user_id', 'created_at'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
+    excerpt = db.Column(db.String(EXCERPT_LENGTH + 3))  # Preview kept in sync with content
     sentiment = db.Column(db.String(20))  # AI-analyzed sentiment
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @validates('content')
+    def update_excerpt(self, key, content):
+        self.excerpt = make_excerpt(content)
+        return content
+    
+    def preview(self, length=EXCERPT_LENGTH):
+        """Content preview of up to `length` characters, built from the stored excerpt"""
+        if self.excerpt is None:
+            # Not backfilled yet; falls back to loading the full content
+            return make_excerpt(self.content, length)
+        truncated = len(self.excerpt) > EXCERPT_LENGTH
+        text = self.excerpt[:EXCERPT_LENGTH] if truncated else self.excerpt
+        if len(text) > length:
+            return text[:length] + '...'
+        return text + '...' if truncated else text
+
+class SentimentCache(db.Model):
+    """Sentiment results shared across worker processes, keyed by normalized-text hash"""
+    text_hash = db.Column(db.String(64), primary_key=True)  # SHA-256 hex digest
+    sentiment = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class GeneratedContent(db.Model):
+    """Pre-generated AI affirmations and journal prompts, consumed one per request"""
+    __table_args__ = (db.Index('ix_generated_content_pool', 'kind', 'mood', 'id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # affirmation, journal_prompt
+    mood = db.Column(db.Integer, nullable=False, default=0)  # 1-5 bucket, 0 when not mood-specific
+    text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class DashboardVersion(db.Model):
+    """Per-user counter bumped on every write that changes the dashboard; part of the cache key"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+class JobLease(db.Model):
+    """Time-limited claims that keep a periodic job to one worker process at a time"""
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(120), nullable=False)  # hostname:pid
+    expires_at = db.Column(db.DateTime, nullable=False)
 
 class Habit(db.Model):
+    __table_args__ = (db.Index('ix_habit_user_created', 'user_id', 'created_at'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
@@ -62,6 +138,11 @@ class Habit(db.Model):
     logs = db.relationship('HabitLog', backref='habit', lazy=True)
 
 class HabitLog(db.Model):
+    __table_args__ = (
+        db.Index('ix_habit_log_habit_logged', 'habit_id', 'logged_at'),
+        db.Index('ix_habit_log_user_logged', 'user_id', 'logged_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     habit_id = db.Column(db.Integer, db.ForeignKey('habit.id'), nullable=False)
@@ -70,6 +151,8 @@ class HabitLog(db.Model):
     logged_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Payment(db.Model):
+    __table_args__ = (db.Index('ix_payment_user_created', 'user_id', 'created_at'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     paystack_reference = db.Column(db.String(100), unique=True, nullable=False)
@@ -79,4 +162,32 @@ class Payment(db.Model):
     payment_type = db.Column(db.String(20), default='subscription')  # subscription, one_time
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    payment_metadata = db.Column(db.JSON)  # Store additional payment data
\ No newline at end of file
+    payment_metadata = db.Column(db.JSON)  # Store additional payment data
+
+class WebhookInbox(db.Model):
+    """Verified Paystack webhook payloads waiting for app.webhook_inbox to apply them"""
+    __table_args__ = (db.Index('ix_webhook_inbox_pending', 'processed_at', 'id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    reference = db.Column(db.String(100), unique=True, nullable=False)
+    event = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+
+class EmailOutbox(db.Model):
+    """Rendered emails waiting for app.email_outbox to deliver them"""
+    __table_args__ = (db.Index('ix_email_outbox_due', 'status', 'next_attempt_at'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    to_address = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)  # Full RFC 5322 message
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
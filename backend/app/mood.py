@@ -1,12 +1,48 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import Mood
+from app.dashboard_cache import invalidate_dashboard_summary
+from app.models import Mood, MoodDaily
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 
 mood_bp = Blueprint('mood', __name__)
 
+MAX_HISTORY_DAYS = 365
+
+def add_to_daily_rollup(user_id, day, mood_value):
+    """Fold one mood entry into the user's MoodDaily row within the current transaction"""
+    bucket = getattr(MoodDaily, f'count_{mood_value}')
+    increments = {
+        MoodDaily.mood_sum: MoodDaily.mood_sum + mood_value,
+        MoodDaily.mood_count: MoodDaily.mood_count + 1,
+        bucket: bucket + 1
+    }
+    rollup = MoodDaily.query.filter_by(user_id=user_id, date=day)
+    
+    if rollup.update(increments, synchronize_session=False):
+        return
+    
+    try:
+        with db.session.begin_nested():
+            db.session.add(MoodDaily(
+                user_id=user_id,
+                date=day,
+                mood_sum=mood_value,
+                mood_count=1,
+                **{f'count_{mood_value}': 1}
+            ))
+    except IntegrityError:
+        # A concurrent request created the row first
+        rollup.update(increments, synchronize_session=False)
+
+def get_daily_rollups(user_id, start_day):
+    """MoodDaily rows for a user from start_day onwards, oldest first"""
+    return MoodDaily.query.filter(
+        MoodDaily.user_id == user_id,
+        MoodDaily.date >= start_day
+    ).order_by(MoodDaily.date).all()
+
 @mood_bp.route('/log', methods=['POST'])
 @jwt_required()
 def log_mood():
@@ -17,12 +53,15 @@ def log_mood():
         mood_value = data.get('mood')
         notes = data.get('notes', '')
         
-        if not mood_value or mood_value < 1 or mood_value > 5:
+        # bool is an int subclass; JSON true/false is not a mood
+        if isinstance(mood_value, bool) or not isinstance(mood_value, int) or mood_value < 1 or mood_value > 5:
             return jsonify({'error': 'Mood must be between 1 and 5'}), 400
         
-        mood = Mood(user_id=user_id, mood=mood_value, notes=notes)
+        mood = Mood(user_id=user_id, mood=mood_value, notes=notes, created_at=datetime.utcnow())
         db.session.add(mood)
+        add_to_daily_rollup(user_id, mood.created_at.date(), mood_value)
         db.session.commit()
+        invalidate_dashboard_summary(user_id)
         
         return jsonify({
             'message': 'Mood logged successfully',
@@ -42,7 +81,7 @@ def log_mood():
 def get_mood_history():
     try:
         user_id = int(get_jwt_identity())
-        days = request.args.get('days', 7, type=int)
+        days = min(request.args.get('days', 7, type=int), MAX_HISTORY_DAYS)
         
         start_date = datetime.utcnow() - timedelta(days=days)
         
@@ -68,32 +107,28 @@ def get_mood_history():
 def get_mood_stats():
     try:
         user_id = int(get_jwt_identity())
-        days = request.args.get('days', 30, type=int)
+        days = min(request.args.get('days', 30, type=int), MAX_HISTORY_DAYS)
         
-        start_date = datetime.utcnow() - timedelta(days=days)
+        start_day = (datetime.utcnow() - timedelta(days=days)).date()
         
-        # Get average mood
-        avg_mood = db.session.query(func.avg(Mood.mood)).filter(
-            Mood.user_id == user_id,
-            Mood.created_at >= start_date
-        ).scalar()
+        # Read from the daily rollup so the cost grows with days, not entries
+        rollups = get_daily_rollups(user_id, start_day)
         
-        # Get mood distribution
-        mood_distribution = db.session.query(
-            Mood.mood,
-            func.count(Mood.mood)
-        ).filter(
-            Mood.user_id == user_id,
-            Mood.created_at >= start_date
-        ).group_by(Mood.mood).all()
+        total = sum(rollup.mood_sum for rollup in rollups)
+        count = sum(rollup.mood_count for rollup in rollups)
+        avg_mood = total / count if count else 0
         
-        distribution = {str(mood): count for mood, count in mood_distribution}
+        distribution = {}
+        for value in range(1, 6):
+            value_count = sum(getattr(rollup, f'count_{value}') for rollup in rollups)
+            if value_count:
+                distribution[str(value)] = value_count
         
         return jsonify({
-            'average_mood': round(avg_mood or 0, 2),
+            'average_mood': round(avg_mood, 2),
             'mood_distribution': distribution,
             'period_days': days
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,250 @@
+import os
+import random
+import threading
+import time
+from app.metrics import record_external_call
+from app.stats import LatencyWindow, register_stats
+from config import Config
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+# openai and httpx are imported on first use rather than here; together they take
+# longer to import than the rest of the app, and most requests never call OpenAI
+
+def retryable_errors():
+    """Errors worth retrying: the provider was unreachable, too slow, overloaded or failing"""
+    import openai
+    return (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling OpenAI while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """Stops calls after repeated failures, then lets one probe through after a cool-down.
+
+    closed -> open after `failure_threshold` consecutive failures; open -> half_open
+    once `reset_timeout` seconds have passed; half_open -> closed on a successful
+    probe, or back to open if it fails.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+            }
+
+breaker = CircuitBreaker(Config.OPENAI_BREAKER_FAILURES, Config.OPENAI_BREAKER_RESET_SECONDS)
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+_counters = {'calls': 0, 'failures': 0, 'retries': 0, 'short_circuits': 0, 'streams': 0, 'streams_cancelled': 0}
+_latencies = LatencyWindow()
+_metrics_lock = threading.Lock()
+
+def get_client():
+    """The process-wide OpenAI client; its HTTP connection pool is reused across requests.
+
+    Connections do not survive fork, so each worker process builds its own client.
+    """
+    global _client, _client_pid
+    import httpx
+    import openai
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            timeout = httpx.Timeout(Config.OPENAI_TIMEOUT, connect=Config.OPENAI_CONNECT_TIMEOUT)
+            http_client = httpx.Client(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=Config.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.OPENAI_MAX_CONNECTIONS
+                )
+            )
+            # Retries are handled here so they can be jittered and counted by the breaker
+            _client = openai.OpenAI(
+                api_key=Config.OPENAI_API_KEY,
+                base_url=Config.OPENAI_BASE_URL,
+                timeout=timeout,
+                max_retries=0,
+                http_client=http_client
+            )
+            _client_pid = os.getpid()
+        return _client
+
+def _record_call(seconds, failed):
+    with _metrics_lock:
+        _counters['calls'] += 1
+        if failed:
+            _counters['failures'] += 1
+    _latencies.record(seconds)
+    record_external_call('openai', seconds, failed)
+
+def _count(name):
+    with _metrics_lock:
+        _counters[name] += 1
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff before retry number `attempt + 1`"""
+    ceiling = min(Config.OPENAI_RETRY_BACKOFF_MAX, Config.OPENAI_RETRY_BACKOFF * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+def chat_completion(messages, max_tokens, temperature, model=DEFAULT_MODEL, timeout=None):
+    """Run a chat completion and return the message text.
+
+    Raises CircuitOpenError without calling OpenAI while the breaker is open,
+    so callers fall straight through to their fallbacks.
+    """
+    if not breaker.allow():
+        _count('short_circuits')
+        raise CircuitOpenError("OpenAI circuit breaker is open")
+
+    import openai
+    options = {'timeout': timeout} if timeout is not None else {}
+    attempts = Config.OPENAI_MAX_RETRIES + 1
+    for attempt in range(attempts):
+        start = time.perf_counter()
+        try:
+            response = get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **options
+            )
+        except retryable_errors():
+            _record_call(time.perf_counter() - start, failed=True)
+            if attempt + 1 >= attempts:
+                breaker.record_failure()
+                raise
+            _count('retries')
+            time.sleep(_backoff(attempt))
+            continue
+        except openai.APIStatusError:
+            # The provider answered, so it is healthy even though the request was rejected
+            _record_call(time.perf_counter() - start, failed=True)
+            breaker.record_success()
+            raise
+        except BaseException:
+            # Anything else, a bug or a gevent Timeout included, still settles a half-open probe
+            _record_call(time.perf_counter() - start, failed=True)
+            breaker.record_failure()
+            raise
+
+        _record_call(time.perf_counter() - start, failed=False)
+        breaker.record_success()
+        return response.choices[0].message.content
+
+def stream_chat_completion(messages, max_tokens, temperature, model=DEFAULT_MODEL):
+    """Yield the completion text in pieces as OpenAI generates it.
+
+    Streams are not retried. Closing the generator, e.g. when the client
+    disconnects, closes the upstream response so generation stops there too.
+    """
+    if not breaker.allow():
+        _count('short_circuits')
+        raise CircuitOpenError("OpenAI circuit breaker is open")
+
+    import openai
+    start = time.perf_counter()
+    try:
+        stream = get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+    except retryable_errors():
+        _record_call(time.perf_counter() - start, failed=True)
+        breaker.record_failure()
+        raise
+    except openai.APIStatusError:
+        _record_call(time.perf_counter() - start, failed=True)
+        breaker.record_success()
+        raise
+    except BaseException:
+        _record_call(time.perf_counter() - start, failed=True)
+        breaker.record_failure()
+        raise
+
+    # Latency for streams is time to the response headers, roughly time to first token
+    _record_call(time.perf_counter() - start, failed=False)
+    breaker.record_success()
+    _count('streams')
+
+    finished = False
+    try:
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+        finished = True
+    except retryable_errors():
+        _count('failures')
+        breaker.record_failure()
+        raise
+    except GeneratorExit:
+        _count('streams_cancelled')
+        raise
+    finally:
+        if not finished:
+            stream.response.close()
+
+def openai_stats():
+    with _metrics_lock:
+        stats = dict(_counters)
+    stats['breaker'] = breaker.stats()
+    stats['latency_ms'] = _latencies.summary()
+    return stats
+
+register_stats('openai', openai_stats)
@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+from app.stats import register_stats
+from config import Config
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool is saturated or a job outlives PASSWORD_HASH_TIMEOUT"""
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+# These run in the pool's worker processes, so they must stay importable top-level functions
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _check(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+_executor = None
+_executor_pid = None
+_slots = None
+_executor_lock = threading.Lock()
+
+_counters = {'hashed': 0, 'verified': 0, 'rejected': 0, 'timed_out': 0, 'seconds': 0.0}
+_counters_lock = threading.Lock()
+
+def _get_executor():
+    # Created lazily, and again after fork, so each gunicorn worker owns its pool
+    global _executor, _executor_pid, _slots
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # Forking a threaded worker can copy locks other threads hold, so pool processes
+            # come from a clean forkserver (spawn where that is unavailable)
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _executor = ProcessPoolExecutor(
+                max_workers=Config.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context(method)
+            )
+            _executor_pid = os.getpid()
+            # Running plus queued jobs this process admits before turning requests away
+            _slots = threading.BoundedSemaphore(Config.PASSWORD_HASH_WORKERS + Config.PASSWORD_HASH_QUEUE_LIMIT)
+        return _executor, _slots
+
+def _run(counter, func, *args):
+    start = time.perf_counter()
+    if Config.PASSWORD_HASH_WORKERS <= 0:
+        result = func(*args)
+    else:
+        executor, slots = _get_executor()
+        if not slots.acquire(blocking=False):
+            with _counters_lock:
+                _counters['rejected'] += 1
+            raise PasswordHashingBusy(Config.PASSWORD_HASH_RETRY_AFTER)
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            result = future.result(timeout=Config.PASSWORD_HASH_TIMEOUT)
+        except FutureTimeoutError:
+            # A job still queued is dropped; one already running keeps its slot until it finishes
+            future.cancel()
+            with _counters_lock:
+                _counters['timed_out'] += 1
+            raise PasswordHashingBusy(Config.PASSWORD_HASH_RETRY_AFTER)
+
+    with _counters_lock:
+        _counters[counter] += 1
+        _counters['seconds'] += time.perf_counter() - start
+    return result
+
+def hash_password(password):
+    """bcrypt hash of a password at the configured cost"""
+    return _run('hashed', _hash, password, Config.BCRYPT_ROUNDS)
+
+def verify_password(password, password_hash):
+    return _run('verified', _check, password, password_hash)
+
+def needs_rehash(password_hash):
+    """Whether a stored hash was made with a different cost than BCRYPT_ROUNDS"""
+    try:
+        return int(password_hash.split('$')[2]) != Config.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+def password_hashing_stats():
+    with _counters_lock:
+        stats = dict(_counters)
+    operations = stats['hashed'] + stats['verified']
+    stats['avg_ms'] = round(stats.pop('seconds') / operations * 1000, 1) if operations else 0.0
+    stats['workers'] = Config.PASSWORD_HASH_WORKERS
+    stats['queue_limit'] = Config.PASSWORD_HASH_QUEUE_LIMIT
+    stats['rounds'] = Config.BCRYPT_ROUNDS
+    return stats
+
+register_stats('password_hashing', password_hashing_stats)
@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from app import db
 from app.models import User, Payment
+from app.paystack import PaystackError, PaystackNotConfigured, verify_transaction
+from app.webhook_inbox import enqueue_webhook, inbox_worker
+from app.subscriptions import Subscription, get_subscription, invalidate_subscription, issue_access_token
 from datetime import datetime, timedelta
-import requests
 import os
 import hmac
 import hashlib
@@ -39,25 +41,16 @@ def verify_payment():
             return jsonify({'error': 'User not found'}), 404
         
         # Verify payment with Paystack
-        paystack_secret = os.getenv('PAYSTACK_SECRET_KEY')
-        if not paystack_secret:
+        try:
+            paystack_data = verify_transaction(reference)
+        except PaystackNotConfigured:
             return jsonify({'error': 'Payment service not configured'}), 500
-        
-        headers = {
-            'Authorization': f'Bearer {paystack_secret}',
-            'Content-Type': 'application/json'
-        }
-        
-        response = requests.get(
-            f'https://api.paystack.co/transaction/verify/{reference}',
-            headers=headers
-        )
-        
-        if response.status_code != 200:
+        except PaystackError as e:
+            current_app.logger.warning(f"Paystack verification failed for {reference}: {e}")
+            if e.status_code is None or e.status_code >= 500:
+                return jsonify({'error': 'Payment service is temporarily unavailable. Please try again.'}), 503
             return jsonify({'error': 'Failed to verify payment'}), 400
         
-        paystack_data = response.json()
-        
         if paystack_data['status'] and paystack_data['data']['status'] == 'success':
             # Payment successful
             transaction_data = paystack_data['data']
@@ -74,7 +67,7 @@ def verify_payment():
                 amount=transaction_data['amount'],
                 currency=transaction_data['currency'],
                 status='success',
-                metadata=transaction_data
+                payment_metadata=transaction_data
             )
             
             # Update user subscription
@@ -84,11 +77,14 @@ def verify_payment():
             
             db.session.add(payment)
             db.session.commit()
+            invalidate_subscription(user.id)
             
+            # The caller's token still says free; hand back one with the new claims
             return jsonify({
                 'message': 'Payment verified successfully',
                 'subscription_status': 'premium',
-                'expires_at': user.subscription_expires_at.isoformat()
+                'expires_at': user.subscription_expires_at.isoformat(),
+                'access_token': issue_access_token(user.id, Subscription.of(user))
             })
         else:
             return jsonify({'error': 'Payment verification failed'}), 400
@@ -113,42 +109,15 @@ def paystack_webhook():
         data = request.get_json()
         event = data.get('event')
         
+        # Acknowledge quickly so Paystack does not retry; app.webhook_inbox applies the event
         if event == 'charge.success':
-            transaction_data = data['data']
-            reference = transaction_data['reference']
-            
-            # Check if payment already processed
-            existing_payment = Payment.query.filter_by(paystack_reference=reference).first()
-            if existing_payment:
-                return jsonify({'status': 'already_processed'})
-            
-            # Find user by email (Paystack sends customer email)
-            customer_email = transaction_data.get('customer', {}).get('email')
-            if not customer_email:
-                return jsonify({'error': 'No customer email found'}), 400
-            
-            user = User.query.filter_by(email=customer_email).first()
-            if not user:
-                return jsonify({'error': 'User not found'}), 404
+            reference = (data.get('data') or {}).get('reference')
+            if not reference:
+                return jsonify({'error': 'No reference found'}), 400
             
-            # Create payment record
-            payment = Payment(
-                user_id=user.id,
-                paystack_reference=reference,
-                amount=transaction_data['amount'],
-                currency=transaction_data['currency'],
-                status='success',
-                metadata=transaction_data
-            )
-            
-            # Update user subscription
-            user.subscription_status = 'premium'
-            user.subscription_expires_at = datetime.utcnow() + timedelta(days=30)
-            
-            db.session.add(payment)
-            db.session.commit()
-            
-            current_app.logger.info(f"Payment processed successfully for user {user.id}")
+            if not enqueue_webhook(event, reference, data):
+                return jsonify({'status': 'already_received'})
+            inbox_worker.wake()
             
         return jsonify({'status': 'success'})
         
@@ -161,17 +130,23 @@ def paystack_webhook():
 def get_subscription_status():
     """Get current user's subscription status"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user_id = int(get_jwt_identity())
+        subscription = get_subscription(user_id)
         
-        if not user:
+        if not subscription:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify({
-            'subscription_status': user.subscription_status,
-            'is_premium': user.is_premium(),
-            'expires_at': user.subscription_expires_at.isoformat() if user.subscription_expires_at else None
-        })
+        result = {
+            'subscription_status': subscription.status,
+            'is_premium': subscription.is_premium(),
+            'expires_at': subscription.expires_at.isoformat() if subscription.expires_at else None
+        }
+        
+        # Re-issue the token when the subscription changed since it was signed, e.g. by the webhook
+        if not subscription.matches_claims(get_jwt()):
+            result['access_token'] = issue_access_token(user_id, subscription)
+        
+        return jsonify(result)
         
     except Exception as e:
         current_app.logger.error(f"Subscription status error: {str(e)}")
@@ -190,10 +165,12 @@ def cancel_subscription():
         
         user.subscription_status = 'cancelled'
         db.session.commit()
+        invalidate_subscription(user.id)
         
         return jsonify({
             'message': 'Subscription cancelled successfully',
-            'subscription_status': 'cancelled'
+            'subscription_status': 'cancelled',
+            'access_token': issue_access_token(user.id, Subscription.of(user))
         })
         
     except Exception as e:
@@ -205,11 +182,7 @@ def cancel_subscription():
 def get_payment_history():
     """Get user's payment history"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user_id = int(get_jwt_identity())
         
         payments = Payment.query.filter_by(user_id=user_id).order_by(Payment.created_at.desc()).all()
         
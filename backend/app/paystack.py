@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from urllib.parse import quote
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.metrics import record_external_call
+from app.stats import LatencyWindow, register_stats
+from config import Config
+
+class PaystackError(Exception):
+    """Paystack could not be reached or answered with an error"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class PaystackNotConfigured(PaystackError):
+    """PAYSTACK_SECRET_KEY is not set"""
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_counters = {'calls': 0, 'errors': 0, 'timeouts': 0, 'retries': 0}
+_counters_lock = threading.Lock()
+_latencies = LatencyWindow()
+
+def _count(name, amount=1):
+    with _counters_lock:
+        _counters[name] += amount
+
+def get_session():
+    """The process-wide Session; keeps connections to Paystack alive between requests.
+
+    Sockets are not shared across fork, so each worker process builds its own.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            # Only idempotent reads are retried, on connection errors and overload/5xx answers
+            retry = Retry(
+                total=Config.PAYSTACK_MAX_RETRIES,
+                backoff_factor=Config.PAYSTACK_RETRY_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.PAYSTACK_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+            _session_pid = os.getpid()
+        return _session
+
+def _request(method, path, **kwargs):
+    secret = os.getenv('PAYSTACK_SECRET_KEY')
+    if not secret:
+        raise PaystackNotConfigured("Payment service not configured")
+
+    headers = {
+        'Authorization': f'Bearer {secret}',
+        'Content-Type': 'application/json'
+    }
+    url = f"{Config.PAYSTACK_BASE_URL.rstrip('/')}{path}"
+    timeout = (Config.PAYSTACK_CONNECT_TIMEOUT, Config.PAYSTACK_READ_TIMEOUT)
+
+    start = time.perf_counter()
+    _count('calls')
+    response = None
+    try:
+        response = get_session().request(method, url, headers=headers, timeout=timeout, **kwargs)
+    except requests.Timeout as e:
+        _count('timeouts')
+        _count('errors')
+        raise PaystackError(f"Paystack timed out: {e}")
+    except requests.RequestException as e:
+        _count('errors')
+        raise PaystackError(f"Paystack request failed: {e}")
+    finally:
+        elapsed = time.perf_counter() - start
+        _latencies.record(elapsed)
+        record_external_call('paystack', elapsed, response is None or response.status_code != 200)
+
+    retries = response.raw.retries
+    if retries is not None and retries.history:
+        _count('retries', len(retries.history))
+    if response.status_code != 200:
+        _count('errors')
+        raise PaystackError(f"Paystack answered HTTP {response.status_code}", response.status_code)
+    return response.json()
+
+def verify_transaction(reference):
+    """Paystack's verification payload for a transaction reference"""
+    return _request('GET', f"/transaction/verify/{quote(reference, safe='')}")
+
+def paystack_stats():
+    with _counters_lock:
+        stats = dict(_counters)
+    stats['latency_ms'] = _latencies.summary()
+    return stats
+
+register_stats('paystack', paystack_stats)
@@ -1,7 +1,7 @@
 from functools import wraps
 from flask import jsonify, request
 from flask_jwt_extended import get_jwt_identity
-from app.models import User
+from app.subscriptions import current_subscription
 
 def require_premium(f):
     """Decorator to require premium subscription for routes"""
@@ -12,14 +12,15 @@ def require_premium(f):
             if not user_id:
                 return jsonify({'error': 'Authentication required'}), 401
             
-            user = User.query.get(user_id)
-            if not user:
+            # Free-tier claims are trusted; premium ones are confirmed against the cached row
+            subscription = current_subscription()
+            if not subscription:
                 return jsonify({'error': 'User not found'}), 404
             
-            if not user.is_premium():
+            if not subscription.is_premium():
                 return jsonify({
                     'error': 'Premium subscription required',
-                    'subscription_status': user.subscription_status,
+                    'subscription_status': subscription.status,
                     'upgrade_url': '/pricing'
                 }), 403
             
@@ -38,13 +39,13 @@ def check_premium_status(f):
             if not user_id:
                 return jsonify({'error': 'Authentication required'}), 401
             
-            user = User.query.get(user_id)
-            if not user:
+            subscription = current_subscription()
+            if not subscription:
                 return jsonify({'error': 'User not found'}), 404
             
             # Add premium status to request context
-            request.premium_user = user.is_premium()
-            request.user = user
+            request.premium_user = subscription.is_premium()
+            request.subscription = subscription
             
             return f(*args, **kwargs)
         except Exception as e:
@@ -0,0 +1,142 @@
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import Config
+
+_installed = False
+
+# (thread id, list) pairs collecting statements for capture_queries()
+_captures = []
+_captures_lock = threading.Lock()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_start_time'] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop('query_start_time', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+
+    if _captures:
+        ident = threading.get_ident()
+        with _captures_lock:
+            for owner, captured in _captures:
+                if owner == ident:
+                    captured.append((statement, elapsed))
+
+    if not has_app_context():
+        return
+    g.query_count = g.get('query_count', 0) + 1
+    g.query_time = g.get('query_time', 0.0) + elapsed
+
+    # Only set while the SQL profiler is on for the current request
+    log = g.get('query_log')
+    if log is not None:
+        log.append((statement, elapsed))
+        if elapsed * 1000 >= Config.SQL_SLOW_QUERY_MS:
+            current_app.logger.warning(
+                f"Slow query ({elapsed * 1000:.1f} ms) in {request.endpoint}: {_truncate(statement)}"
+            )
+
+def install_query_stats():
+    """Count the SQL statements executed while an app context is active"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _installed = True
+
+def get_query_count():
+    """Number of statements executed in the current app context"""
+    return g.get('query_count', 0) if has_app_context() else 0
+
+def get_query_time():
+    """Seconds spent executing statements in the current app context"""
+    return g.get('query_time', 0.0) if has_app_context() else 0.0
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def statement_shape(statement):
+    """A statement with literals and parameter lists collapsed, so repeats compare equal"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = shape.replace('%s', '?')
+    shape = _PLACEHOLDER_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+def repeated_shapes(statements, threshold):
+    """(count, shape) for statement shapes run at least `threshold` times, most frequent first"""
+    counts = Counter(statement_shape(statement) for statement, _ in statements)
+    return [(count, shape) for shape, count in counts.most_common() if count >= threshold]
+
+def _truncate(statement, length=300):
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    return statement if len(statement) <= length else statement[:length] + '...'
+
+def install_sql_profiler(app):
+    """Record every statement per request, warn about likely N+1 patterns and slow queries.
+
+    Outside production the query count and time are also sent as X-Query-Count
+    and X-Query-Time (milliseconds) response headers.
+    """
+    if not app.config.get('SQL_PROFILER_ENABLED'):
+        return
+
+    @app.before_request
+    def start_query_log():
+        g.query_log = []
+
+    @app.after_request
+    def report_query_log(response):
+        log = g.pop('query_log', None)
+        if log is None:
+            return response
+
+        for count, shape in repeated_shapes(log, Config.SQL_N_PLUS_ONE_THRESHOLD):
+            app.logger.warning(
+                f"Possible N+1 in {request.endpoint}: {count} x {_truncate(shape)}"
+            )
+
+        if app.config.get('SQL_PROFILER_HEADERS'):
+            response.headers['X-Query-Count'] = str(get_query_count())
+            response.headers['X-Query-Time'] = f"{get_query_time() * 1000:.1f}"
+        return response
+
+@contextmanager
+def capture_queries():
+    """Collect (statement, seconds) for every statement this thread runs inside the block"""
+    captured = []
+    entry = (threading.get_ident(), captured)
+    with _captures_lock:
+        _captures.append(entry)
+    try:
+        yield captured
+    finally:
+        with _captures_lock:
+            _captures.remove(entry)
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail a test when the block runs more than `limit` SQL statements.
+
+        with assert_max_queries(4):
+            response = client.get('/api/habits/list', headers=auth_headers)
+
+    Works with Flask's test client, whose requests run on the calling thread.
+    """
+    with capture_queries() as captured:
+        yield captured
+    if len(captured) > limit:
+        counts = Counter(statement_shape(statement) for statement, _ in captured)
+        details = '\n'.join(f"  {count} x {_truncate(shape, 200)}" for shape, count in counts.most_common())
+        raise AssertionError(f"{len(captured)} queries executed, expected at most {limit}:\n{details}")
@@ -0,0 +1,156 @@
+import html
+import re
+import time
+from sqlalchemy import inspect, text
+from app import db
+
+# Full-text index over journal titles and content: an FTS5 table on SQLite,
+# a FULLTEXT index on MySQL
+FTS_TABLE = 'journal_fts'
+MYSQL_FULLTEXT_INDEX = 'ft_journal_title_content'
+
+# Control characters mark highlighted terms until the snippet has been HTML-escaped
+_MARK_START, _MARK_END = '\x02', '\x03'
+SNIPPET_CHARS = 160
+
+# Engine URL -> True once the index exists, or the monotonic time a missing
+# index was last seen; a missing index is looked for again after the recheck
+# interval, so workers started before `init_db.py migrate` pick it up
+_available = {}
+MISSING_INDEX_RECHECK_SECONDS = 60
+
+def _dialect():
+    return db.engine.dialect.name
+
+def ensure_search_index():
+    """Create the journal full-text index if it is missing, indexing existing entries"""
+    dialect = _dialect()
+    inspector = inspect(db.engine)
+
+    if dialect == 'sqlite':
+        if FTS_TABLE not in inspector.get_table_names():
+            with db.engine.begin() as conn:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    f"title, content, content='journal', content_rowid='id', tokenize='porter unicode61')"
+                ))
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    elif dialect == 'mysql':
+        existing = {index['name'] for index in inspector.get_indexes('journal')}
+        if MYSQL_FULLTEXT_INDEX not in existing:
+            with db.engine.begin() as conn:
+                conn.execute(text(
+                    f"ALTER TABLE journal ADD FULLTEXT INDEX {MYSQL_FULLTEXT_INDEX} (title, content)"
+                ))
+    _available.pop(str(db.engine.url), None)
+
+def rebuild_search_index():
+    """Re-index every journal entry (SQLite only; MySQL maintains FULLTEXT itself)"""
+    if _dialect() == 'sqlite' and search_available():
+        with db.engine.begin() as conn:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+def search_available():
+    key = str(db.engine.url)
+    state = _available.get(key)
+    if state is True:
+        return True
+    if state is not None and time.monotonic() - state < MISSING_INDEX_RECHECK_SECONDS:
+        return False
+
+    # Inspect on the session's connection so the check joins any open transaction
+    inspector = inspect(db.session.connection())
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        available = FTS_TABLE in inspector.get_table_names()
+    elif dialect == 'mysql':
+        available = MYSQL_FULLTEXT_INDEX in {index['name'] for index in inspector.get_indexes('journal')}
+    else:
+        available = False
+    _available[key] = True if available else time.monotonic()
+    return available
+
+def index_entry(entry):
+    """Add a flushed journal entry to the index within the current transaction"""
+    if _dialect() == 'sqlite' and search_available():
+        db.session.execute(
+            text(f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (:id, :title, :content)"),
+            {'id': entry.id, 'title': entry.title, 'content': entry.content}
+        )
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '', re.UNICODE)
+
+def search_entries(user_id, query, limit, offset):
+    """Return up to `limit` ranked matches for the user's entries plus whether more exist"""
+    terms = search_terms(query)
+    if _dialect() == 'sqlite':
+        rows = _search_sqlite(user_id, terms, limit + 1, offset)
+    else:
+        rows = _search_mysql(user_id, terms, limit + 1, offset)
+    return rows[:limit], len(rows) > limit
+
+def _search_sqlite(user_id, terms, limit, offset):
+    # Quote each term so user input cannot inject FTS5 syntax; prefix-match the last one
+    match = ' '.join(f'"{term}"' for term in terms) + '*'
+    rows = db.session.execute(text(
+        f"SELECT journal.id, journal.title, journal.sentiment, journal.created_at, "
+        f"highlight({FTS_TABLE}, 0, :start, :end) AS title_highlight, "
+        f"snippet({FTS_TABLE}, 1, :start, :end, '...', 24) AS snippet, "
+        f"bm25({FTS_TABLE}, 5.0, 1.0) AS score "
+        f"FROM {FTS_TABLE} JOIN journal ON journal.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH :match AND journal.user_id = :user_id "
+        f"ORDER BY score LIMIT :limit OFFSET :offset"
+    ).columns(created_at=db.DateTime), {
+        'start': _MARK_START, 'end': _MARK_END, 'match': match,
+        'user_id': user_id, 'limit': limit, 'offset': offset
+    }).mappings().all()
+
+    # bm25() is lower-is-better; flip it so higher scores rank first
+    return [_result(row, row['title_highlight'], row['snippet'], -row['score']) for row in rows]
+
+def _search_mysql(user_id, terms, limit, offset):
+    query = ' '.join(terms)
+    rows = db.session.execute(text(
+        f"SELECT id, title, content, sentiment, created_at, "
+        f"MATCH(title, content) AGAINST (:query IN NATURAL LANGUAGE MODE) AS score "
+        f"FROM journal "
+        f"WHERE user_id = :user_id AND MATCH(title, content) AGAINST (:query IN NATURAL LANGUAGE MODE) "
+        f"ORDER BY score DESC LIMIT :limit OFFSET :offset"
+    ).columns(created_at=db.DateTime), {'query': query, 'user_id': user_id, 'limit': limit, 'offset': offset}).mappings().all()
+
+    return [
+        _result(row, _mark_terms(row['title'], terms), _snippet(row['content'], terms), float(row['score']))
+        for row in rows
+    ]
+
+def _mark_terms(value, terms):
+    if not terms:
+        return value
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(term) for term in terms) + r')', re.IGNORECASE)
+    return pattern.sub(lambda match: _MARK_START + match.group(0) + _MARK_END, value)
+
+def _snippet(content, terms):
+    """Window of content around the first matching term, with terms marked"""
+    lowered = content.lower()
+    positions = [lowered.find(term.lower()) for term in terms]
+    positions = [position for position in positions if position >= 0]
+    start = max(min(positions) - SNIPPET_CHARS // 3, 0) if positions else 0
+    window = content[start:start + SNIPPET_CHARS]
+    prefix = '...' if start > 0 else ''
+    suffix = '...' if start + SNIPPET_CHARS < len(content) else ''
+    return prefix + _mark_terms(window, terms) + suffix
+
+def _highlight_html(value):
+    return html.escape(value or '').replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+def _result(row, title, snippet, score):
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'title_highlight': _highlight_html(title),
+        'snippet': _highlight_html(snippet),
+        'sentiment': row['sentiment'],
+        'score': round(score, 4),
+        'created_at': row['created_at'].isoformat()
+    }
@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+from concurrent.futures import Future
+from app.openai_client import chat_completion
+from app.stats import register_stats
+
+SENTIMENT_LABELS = ['positive', 'negative', 'neutral', 'mixed']
+
+BATCH_SYSTEM_PROMPT = (
+    "You are a sentiment analysis expert. For each numbered text, analyze its emotional tone "
+    "as positive, negative, neutral, or mixed. Respond with only a JSON array of the labels, "
+    "one per text, in the same order."
+)
+
+# Rough prompt-size estimate: ~4 characters per token plus per-item numbering overhead
+CHARS_PER_TOKEN = 4
+ITEM_OVERHEAD_TOKENS = 8
+RESPONSE_TOKENS_PER_ITEM = 6
+
+_batch_stats = {}
+_batch_stats_lock = threading.Lock()
+
+def _record_batch(size, seconds):
+    with _batch_stats_lock:
+        stats = _batch_stats.setdefault(size, {'calls': 0, 'items': 0, 'seconds': 0.0})
+        stats['calls'] += 1
+        stats['items'] += size
+        stats['seconds'] += seconds
+
+def batch_stats():
+    """Calls, latency and throughput per number of texts packed into one completion"""
+    with _batch_stats_lock:
+        return {
+            str(size): {
+                'calls': stats['calls'],
+                'items': stats['items'],
+                'avg_latency_ms': round(stats['seconds'] / stats['calls'] * 1000, 1),
+                'items_per_second': round(stats['items'] / stats['seconds'], 2) if stats['seconds'] else 0.0
+            }
+            for size, stats in sorted(_batch_stats.items())
+        }
+
+register_stats('sentiment_batches', batch_stats)
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + ITEM_OVERHEAD_TOKENS
+
+def pack_batches(texts, token_budget, max_items):
+    """Group texts, in order, into chunks that fit the prompt token budget"""
+    batches = []
+    current, current_tokens = [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _classify_chunk(texts):
+    numbered = '\n'.join(f"{index}. {json.dumps(text)}" for index, text in enumerate(texts, 1))
+    content = chat_completion(
+        messages=[
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": numbered}
+        ],
+        max_tokens=RESPONSE_TOKENS_PER_ITEM * len(texts) + 10,
+        temperature=0.1
+    )
+
+    labels = json.loads(content[content.index('['):content.rindex(']') + 1])
+    if not isinstance(labels, list) or len(labels) != len(texts):
+        raise ValueError(f"Expected {len(texts)} labels, got {content!r}")
+
+    labels = [str(label).strip().lower() for label in labels]
+    return [label if label in SENTIMENT_LABELS else 'neutral' for label in labels]
+
+def classify_texts_with_openai(texts, classify_single, token_budget, max_items):
+    """Classify texts in as few completions as the token budget allows.
+
+    Returns one label per text, or None where its completion failed.
+    """
+    results = []
+    for chunk in pack_batches(texts, token_budget, max_items):
+        start = time.perf_counter()
+        try:
+            if len(chunk) == 1:
+                labels = [classify_single(chunk[0])]
+            else:
+                labels = _classify_chunk(chunk)
+        except Exception as e:
+            print(f"Batch sentiment analysis error: {e}")
+            labels = [None] * len(chunk)
+        else:
+            _record_batch(len(chunk), time.perf_counter() - start)
+        results.extend(labels)
+    return results
+
+class MicroBatcher:
+    """Coalesces concurrently submitted items into one handler call.
+
+    The handler receives a list of items and returns a list of results in the
+    same order. An item submitted while the batcher is idle runs at once in the
+    caller's thread. Items arriving while a batch is in flight wait up to the
+    window for others to join them, then one long-lived flusher thread runs
+    them together. The window and item limit of the latest submit apply.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self._pending = []
+        self._in_flight = 0
+        self._window_seconds = 0.0
+        self._max_items = 1
+        self._flusher = None
+        self._condition = threading.Condition()
+
+    def submit(self, item, window_seconds, max_items):
+        future = Future()
+        with self._condition:
+            if not self._in_flight and not self._pending:
+                # Nothing to share a completion with, so don't wait for the window
+                batch = [(item, future)]
+                self._in_flight += 1
+            else:
+                self._pending.append((item, future))
+                self._max_items = max_items
+                if len(self._pending) >= max_items:
+                    batch = self._take_pending()
+                else:
+                    batch = None
+                    self._window_seconds = window_seconds
+                    self._ensure_flusher()
+                    self._condition.notify()
+        if batch:
+            self._run(batch)
+        return future
+
+    def _take_pending(self):
+        batch, self._pending = self._pending, []
+        if batch:
+            self._in_flight += 1
+        return batch
+
+    def _ensure_flusher(self):
+        # Threads do not survive fork, so a worker process starts its own on first use
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_forever, name='sentiment-microbatch', daemon=True)
+            self._flusher.start()
+
+    def _flush_forever(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = time.monotonic() + self._window_seconds
+                while 0 < len(self._pending) < self._max_items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._take_pending()
+            if batch:
+                self._run(batch)
+
+    def _run(self, batch):
+        try:
+            results = self.handler([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.cache import LRUCache
+from app.models import SentimentCache
+from app.stats import register_stats
+from config import Config
+
+# Sentiment of a given text never changes, so entries only leave the memory tier by LRU eviction
+memory_cache = LRUCache(max_entries=Config.SENTIMENT_CACHE_MAX_ENTRIES)
+
+_counters = {'db_hits': 0, 'db_errors': 0, 'misses': 0}
+_counters_lock = threading.Lock()
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+def normalize_text(text):
+    return ' '.join(text.lower().split())
+
+def sentiment_cache_key(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+def _persistent_enabled():
+    return current_app.config.get('SENTIMENT_CACHE_PERSISTENT', Config.SENTIMENT_CACHE_PERSISTENT)
+
+# Keeps each IN list under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+def get_cached_sentiments(keys):
+    """Look many results up at once, returning {key: sentiment} for the hits.
+    
+    The memory tier is checked first; the remaining keys share one IN query
+    per chunk instead of one round trip each.
+    """
+    found = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        sentiment = memory_cache.get(key)
+        if sentiment is not None:
+            found[key] = sentiment
+        else:
+            missing.append(key)
+    
+    if missing and _persistent_enabled():
+        try:
+            # Separate connection so the lookup never touches the caller's transaction
+            with db.engine.connect() as conn:
+                for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+                    chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+                    rows = conn.execute(
+                        select(SentimentCache.text_hash, SentimentCache.sentiment)
+                        .where(SentimentCache.text_hash.in_(chunk))
+                    )
+                    for key, sentiment in rows:
+                        _count('db_hits')
+                        memory_cache.set(key, sentiment)
+                        found[key] = sentiment
+        except Exception as e:
+            _count('db_errors')
+            current_app.logger.warning(f"Sentiment cache lookup failed: {e}")
+    
+    for key in missing:
+        if key not in found:
+            _count('misses')
+    return found
+
+def store_sentiment(key, sentiment):
+    memory_cache.set(key, sentiment)
+    
+    if _persistent_enabled():
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(SentimentCache.__table__.insert().values(
+                    text_hash=key, sentiment=sentiment, created_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Another worker stored the same text first
+            pass
+        except Exception as e:
+            _count('db_errors')
+            current_app.logger.warning(f"Sentiment cache store failed: {e}")
+
+def sentiment_cache_stats():
+    memory = memory_cache.stats()
+    with _counters_lock:
+        counters = dict(_counters)
+    hits = memory['hits'] + counters['db_hits']
+    lookups = hits + counters['misses']
+    return {
+        'memory_entries': memory['entries'],
+        'memory_hits': memory['hits'],
+        'memory_evictions': memory['evictions'],
+        'db_hits': counters['db_hits'],
+        'db_errors': counters['db_errors'],
+        'misses': counters['misses'],
+        'hit_ratio': round(hits / lookups, 4) if lookups else 0.0
+    }
+
+register_stats('sentiment_cache', sentiment_cache_stats)
@@ -0,0 +1,129 @@
+import math
+import re
+import numpy as np
+
+# Word valences on a -3..3 scale, tuned for journal and mood-note vocabulary
+LEXICON = {
+    # positive
+    'amazing': 3, 'awesome': 3, 'blessed': 3, 'brilliant': 3, 'delighted': 3, 'ecstatic': 3,
+    'excellent': 3, 'fantastic': 3, 'incredible': 3, 'joy': 3, 'joyful': 3, 'love': 3, 'loved': 3,
+    'thrilled': 3, 'wonderful': 3, 'best': 3, 'overjoyed': 3, 'perfect': 3,
+    'accomplished': 2, 'appreciate': 2, 'appreciated': 2, 'beautiful': 2, 'calm': 2, 'cheerful': 2,
+    'confident': 2, 'content': 2, 'energized': 2, 'enjoy': 2, 'enjoyed': 2, 'excited': 2, 'fun': 2,
+    'glad': 2, 'good': 2, 'grateful': 2, 'great': 2, 'happy': 2, 'happier': 2, 'healthy': 2,
+    'hopeful': 2, 'inspired': 2, 'kind': 2, 'laugh': 2, 'laughed': 2, 'lovely': 2, 'motivated': 2,
+    'peace': 2, 'peaceful': 2, 'productive': 2, 'proud': 2, 'relaxed': 2, 'relieved': 2, 'rested': 2,
+    'safe': 2, 'smile': 2, 'smiled': 2, 'strong': 2, 'success': 2, 'successful': 2, 'supported': 2,
+    'thankful': 2, 'win': 2, 'progress': 2, 'celebrate': 2, 'celebrated': 2, 'fulfilled': 2,
+    'better': 1, 'comfortable': 1, 'fine': 1, 'hope': 1, 'improve': 1, 'improved': 1, 'improving': 1,
+    'interesting': 1, 'like': 1, 'liked': 1, 'nice': 1, 'okay': 1, 'ok': 1, 'pleasant': 1,
+    'ready': 1, 'rest': 1, 'satisfied': 1, 'support': 1, 'well': 1, 'helped': 1, 'helpful': 1,
+    'friends': 1, 'sunshine': 1, 'positive': 2, 'balanced': 1, 'focused': 1, 'encouraged': 2,
+    # negative
+    'awful': -3, 'depressed': -3, 'devastated': -3, 'hate': -3, 'hated': -3, 'hopeless': -3,
+    'horrible': -3, 'miserable': -3, 'panic': -3, 'terrible': -3, 'worst': -3, 'suicidal': -3,
+    'worthless': -3, 'heartbroken': -3, 'unbearable': -3, 'despair': -3,
+    'afraid': -2, 'angry': -2, 'anxious': -2, 'anxiety': -2, 'bad': -2, 'broken': -2, 'crying': -2,
+    'cried': -2, 'disappointed': -2, 'exhausted': -2, 'fail': -2, 'failed': -2, 'failure': -2,
+    'fear': -2, 'frustrated': -2, 'frustrating': -2, 'guilty': -2, 'hurt': -2, 'lonely': -2,
+    'lost': -2, 'nervous': -2, 'overwhelmed': -2, 'pain': -2, 'painful': -2, 'sad': -2,
+    'scared': -2, 'sick': -2, 'stress': -2, 'stressed': -2, 'stressful': -2, 'struggle': -2,
+    'struggling': -2, 'tense': -2, 'unhappy': -2, 'upset': -2, 'worried': -2, 'worry': -2,
+    'ashamed': -2, 'irritated': -2, 'numb': -2, 'drained': -2, 'insomnia': -2, 'negative': -2,
+    'annoyed': -1, 'bored': -1, 'difficult': -1, 'hard': -1, 'tired': -1, 'down': -1, 'meh': -1,
+    'problem': -1, 'problems': -1, 'rough': -1, 'sore': -1, 'confused': -1, 'restless': -1,
+    'busy': -1, 'pressure': -1, 'conflict': -1, 'argument': -1, 'alone': -1, 'worse': -2,
+}
+
+NEGATORS = {
+    'not', 'no', 'never', 'nothing', 'nobody', 'none', 'neither', 'nor', 'without', 'hardly',
+    'barely', 'cannot', "can't", "don't", "doesn't", "didn't", "isn't", "wasn't", "aren't",
+    "weren't", "won't", "wouldn't", "shouldn't", "couldn't", "haven't", "hasn't", "hadn't",
+    'cant', 'dont', 'doesnt', 'didnt', 'isnt', 'wasnt', 'wont', 'couldnt', 'havent',
+}
+
+INTENSIFIERS = {'very': 1.5, 'really': 1.4, 'so': 1.3, 'extremely': 1.8, 'incredibly': 1.7, 'super': 1.5, 'totally': 1.4}
+
+# Tokens after a negator whose polarity is flipped, and the damping applied when flipping
+NEGATION_WINDOW = 3
+NEGATION_WEIGHT = -0.75
+# Evidence (sum of absolute valence) at which confidence reaches about 63% of its maximum
+EVIDENCE_SCALE = 2.0
+# Both polarities present and the weaker at least this share of the stronger means mixed
+MIXED_RATIO = 0.5
+NO_EVIDENCE_CONFIDENCE = 0.3
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|[.!?;,]")
+# Punctuation tokens end a clause and with it any negation scope
+_BREAKS = {'.', '!', '?', ';', ','}
+
+# Precompiled lookup tables: token -> row in the value arrays
+_VOCAB = {}
+for _word in sorted(set(LEXICON) | NEGATORS | set(INTENSIFIERS) | _BREAKS):
+    _VOCAB[_word] = len(_VOCAB)
+_VALENCE = np.zeros(len(_VOCAB) + 1)
+_IS_NEGATOR = np.zeros(len(_VOCAB) + 1, dtype=bool)
+_IS_BREAK = np.zeros(len(_VOCAB) + 1, dtype=bool)
+_BOOST = np.ones(len(_VOCAB) + 1)
+for _word, _index in _VOCAB.items():
+    _VALENCE[_index] = LEXICON.get(_word, 0)
+    _IS_NEGATOR[_index] = _word in NEGATORS
+    _IS_BREAK[_index] = _word in _BREAKS
+    _BOOST[_index] = INTENSIFIERS.get(_word, 1.0)
+# The extra last row stands for out-of-vocabulary tokens
+_UNKNOWN = len(_VOCAB)
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+def classify_batch(texts):
+    """Classify many texts at once; returns a list of (label, confidence) tuples"""
+    if not texts:
+        return []
+
+    token_ids = []
+    doc_ids = []
+    for doc, text in enumerate(texts):
+        ids = [_VOCAB.get(token, _UNKNOWN) for token in tokenize(text)]
+        # A clause break between documents keeps negation from leaking across them
+        ids.append(_VOCAB['.'])
+        token_ids.extend(ids)
+        doc_ids.extend([doc] * len(ids))
+
+    ids = np.array(token_ids)
+    docs = np.array(doc_ids)
+    positions = np.arange(len(ids))
+
+    # A token is negated when a negator appears within the window before it in the same clause
+    last_negator = np.maximum.accumulate(np.where(_IS_NEGATOR[ids], positions, -1))
+    last_break = np.maximum.accumulate(np.where(_IS_BREAK[ids], positions, -1))
+    distance = positions - last_negator
+    negated = (last_negator > last_break) & (distance > 0) & (distance <= NEGATION_WINDOW)
+
+    # Intensifiers scale the token that follows them
+    boost = np.ones(len(ids))
+    boost[1:] = _BOOST[ids[:-1]]
+
+    scores = _VALENCE[ids] * boost * np.where(negated, NEGATION_WEIGHT, 1.0)
+    positive = np.bincount(docs, weights=np.clip(scores, 0, None), minlength=len(texts))
+    negative = np.bincount(docs, weights=np.clip(-scores, 0, None), minlength=len(texts))
+
+    return [_label(float(pos), float(neg)) for pos, neg in zip(positive, negative)]
+
+def classify(text):
+    """Classify one text as positive/negative/neutral/mixed with a 0-1 confidence"""
+    return classify_batch([text])[0]
+
+def _label(positive, negative):
+    evidence = positive + negative
+    if evidence == 0:
+        return 'neutral', NO_EVIDENCE_CONFIDENCE
+
+    certainty = 1 - math.exp(-evidence / EVIDENCE_SCALE)
+    weaker, stronger = sorted((positive, negative))
+    if weaker > 0 and weaker / stronger >= MIXED_RATIO:
+        return 'mixed', round(certainty * weaker / stronger, 3)
+
+    polarity = (positive - negative) / evidence
+    label = 'positive' if polarity > 0 else 'negative'
+    return label, round(abs(polarity) * certainty, 3)
@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models import Journal
+from app.ai_integration import analyze_sentiment
+from app.dashboard_cache import invalidate_dashboard_summary
+from app.stats import register_stats
+
+PENDING = 'pending'
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+_counters = {'queued': 0, 'completed': 0, 'failed': 0, 'dropped': 0}
+_counters_lock = threading.Lock()
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+def _get_executor(max_workers, queue_limit):
+    # Created lazily so each gunicorn worker gets its own threads after fork
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sentiment')
+            # Running plus queued entries; beyond that new entries stay pending
+            _slots = threading.BoundedSemaphore(max_workers + queue_limit)
+        return _executor, _slots
+
+def analyze_entry(entry_id):
+    """Analyze a pending journal entry and store the result"""
+    # Read on a short-lived connection so none is checked out while OpenAI is called
+    with db.engine.connect() as conn:
+        pending = conn.execute(
+            select(Journal.content, Journal.user_id).where(Journal.id == entry_id, Journal.sentiment == PENDING)
+        ).first()
+    if pending is None:
+        return
+    content, user_id = pending
+    
+    sentiment = analyze_sentiment(content)
+    
+    # Only overwrite the placeholder, in case another worker got there first
+    Journal.query.filter_by(id=entry_id, sentiment=PENDING)\
+        .update({'sentiment': sentiment}, synchronize_session=False)
+    db.session.commit()
+    invalidate_dashboard_summary(user_id)
+
+def _run(app, entry_id):
+    with app.app_context():
+        try:
+            analyze_entry(entry_id)
+            _count('completed')
+        except Exception as e:
+            db.session.rollback()
+            _count('failed')
+            app.logger.error(f"Sentiment analysis failed for entry {entry_id}: {e}")
+
+def schedule_sentiment(entry_id):
+    """Queue sentiment analysis for a committed entry, or run it inline when async is disabled"""
+    app = current_app._get_current_object()
+    if not app.config['SENTIMENT_ASYNC']:
+        analyze_entry(entry_id)
+        return
+    executor, slots = _get_executor(app.config['SENTIMENT_WORKERS'], app.config['SENTIMENT_QUEUE_LIMIT'])
+    if not slots.acquire(blocking=False):
+        # e.g. during an OpenAI outage; `init_db.py analyze-pending-sentiment` picks these up later
+        _count('dropped')
+        app.logger.warning(f"Sentiment queue is full, entry {entry_id} left pending")
+        return
+    _count('queued')
+    try:
+        future = executor.submit(_run, app, entry_id)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+
+def worker_stats():
+    with _counters_lock:
+        stats = dict(_counters)
+    # Dropped entries were never queued
+    stats['in_flight'] = stats['queued'] - stats['completed'] - stats['failed']
+    return stats
+
+register_stats('sentiment_worker', worker_stats)
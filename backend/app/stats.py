@@ -0,0 +1,59 @@
+import hmac
+import threading
+from collections import deque
+from functools import wraps
+from flask import current_app, jsonify, request
+
+# Registry of process-local statistics providers, served on /stats
+_providers = {}
+
+def register_stats(name, provider):
+    """Register a callable returning a JSON-serialisable dict of counters"""
+    _providers[name] = provider
+
+def collect_stats():
+    return {name: provider() for name, provider in _providers.items()}
+
+def ops_access_allowed():
+    """Whether the request comes from OPS_ALLOWED_IPS or carries `Authorization: Bearer <OPS_TOKEN>`"""
+    if request.remote_addr in current_app.config['OPS_ALLOWED_IPS']:
+        return True
+    token = current_app.config.get('OPS_TOKEN')
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    return bool(token) and scheme == 'Bearer' and hmac.compare_digest(supplied.encode(), token.encode())
+
+def require_ops_access(f):
+    """Decorator for operational endpoints; checked before any counter or query runs"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not ops_access_allowed():
+            return jsonify({'error': 'Forbidden'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+class LatencyWindow:
+    """The most recent call durations, summarised as millisecond percentiles"""
+    
+    def __init__(self, size=1000):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def summary(self):
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return {}
+        
+        def percentile(fraction):
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 1)
+        
+        return {
+            'avg': round(sum(ordered) / len(ordered) * 1000, 1),
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'max': round(ordered[-1] * 1000, 1),
+        }
@@ -0,0 +1,75 @@
+from datetime import datetime
+from app import db
+from app.background import PeriodicWorker
+from app.leases import acquire_lease, release_lease
+from app.models import User
+from app.stats import register_stats
+from app.subscriptions import invalidate_subscription
+from config import Config
+
+# One worker process sweeps at a time; the others skip until the lease is free
+SWEEP_LEASE = 'subscription-expiry'
+SWEEP_LEASE_SECONDS = 300
+
+_counters = {'expired': 0, 'sweeps_skipped': 0}
+
+def expire_subscriptions(batch_size=None, now=None):
+    """Mark premium subscriptions whose expiry has passed as 'expired'.
+
+    Works in batches of ids so each UPDATE holds its locks briefly; both
+    statements use ix_user_subscription_expiry. Returns the number of rows changed.
+    """
+    batch_size = batch_size or Config.SUBSCRIPTION_EXPIRY_BATCH_SIZE
+    now = now or datetime.utcnow()
+    total = 0
+    while True:
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(
+            User.subscription_status == 'premium',
+            User.subscription_expires_at < now
+        ).limit(batch_size)]
+        if not user_ids:
+            break
+
+        # Re-check the condition in case a payment renewed one of them meanwhile
+        expired = User.query.filter(
+            User.id.in_(user_ids),
+            User.subscription_status == 'premium',
+            User.subscription_expires_at < now
+        ).update({'subscription_status': 'expired'}, synchronize_session=False)
+        db.session.commit()
+
+        for user_id in user_ids:
+            invalidate_subscription(user_id)
+        total += expired
+        if len(user_ids) < batch_size:
+            break
+
+    _counters['expired'] += total
+    return total
+
+def sweep_expired_subscriptions():
+    """Run expire_subscriptions in whichever worker process holds the sweep lease"""
+    if not acquire_lease(SWEEP_LEASE, SWEEP_LEASE_SECONDS):
+        _counters['sweeps_skipped'] += 1
+        return 0
+    try:
+        return expire_subscriptions()
+    finally:
+        release_lease(SWEEP_LEASE)
+
+expiry_sweeper = PeriodicWorker('subscription-expiry', sweep_expired_subscriptions, interval=Config.SUBSCRIPTION_EXPIRY_INTERVAL)
+
+def install_expiry_sweep(app):
+    """Run the sweep on a background thread in each worker process that serves requests"""
+    if not app.config.get('SUBSCRIPTION_EXPIRY_SWEEP_ENABLED'):
+        return
+
+    @app.before_request
+    def start_expiry_sweeper():
+        if not expiry_sweeper.is_running():
+            expiry_sweeper.start(app)
+
+def expiry_stats():
+    return dict(_counters, sweeper=expiry_sweeper.stats())
+
+register_stats('subscription_expiry', expiry_stats)
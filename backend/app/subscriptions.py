@@ -0,0 +1,84 @@
+from collections import namedtuple
+from datetime import datetime
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
+from app import db
+from app.cache import LRUCache
+from app.models import User
+from app.stats import register_stats
+from config import Config
+
+# JWT claims carrying the subscription as of when the token was issued
+STATUS_CLAIM = 'subscription_status'
+EXPIRES_CLAIM = 'subscription_expires_at'  # Unix timestamp, or None
+
+class Subscription(namedtuple('Subscription', ['status', 'expires_at'])):
+    """A user's subscription tier and expiry, detached from any session"""
+
+    @classmethod
+    def of(cls, user):
+        return cls(user.subscription_status or 'free', user.subscription_expires_at)
+
+    def is_premium(self, now=None):
+        if self.status != 'premium':
+            return False
+        return self.expires_at is None or self.expires_at >= (now or datetime.utcnow())
+
+    def to_claims(self):
+        expires_at = self.expires_at
+        return {
+            STATUS_CLAIM: self.status,
+            # expires_at is naive UTC; compute the epoch without local-time conversion
+            EXPIRES_CLAIM: int((expires_at - datetime(1970, 1, 1)).total_seconds()) if expires_at else None
+        }
+
+    def matches_claims(self, claims):
+        """Whether a token's claims still describe this subscription"""
+        return all(key in claims and claims[key] == value for key, value in self.to_claims().items())
+
+    @classmethod
+    def from_claims(cls, claims):
+        """The subscription recorded in a token, or None for tokens issued without it"""
+        if STATUS_CLAIM not in claims:
+            return None
+        expires = claims.get(EXPIRES_CLAIM)
+        return cls(claims[STATUS_CLAIM], datetime.utcfromtimestamp(expires) if expires is not None else None)
+
+# Subscription rows keyed by user id, for premium checks and tokens without the
+# claims. Per process, so the TTL bounds staleness after a change on another worker.
+subscription_cache = LRUCache(
+    max_entries=Config.SUBSCRIPTION_CACHE_MAX_ENTRIES,
+    ttl=Config.SUBSCRIPTION_CACHE_TTL
+)
+
+register_stats('subscription_cache', subscription_cache.stats)
+
+def issue_access_token(user_id, subscription):
+    return create_access_token(identity=str(user_id), additional_claims=subscription.to_claims())
+
+def get_subscription(user_id):
+    """The stored subscription for a user, or None if the user does not exist"""
+    subscription = subscription_cache.get(user_id)
+    if subscription is None:
+        row = db.session.query(User.subscription_status, User.subscription_expires_at)\
+            .filter_by(id=user_id).first()
+        if row is None:
+            return None
+        subscription = Subscription(row.subscription_status or 'free', row.subscription_expires_at)
+        subscription_cache.set(user_id, subscription)
+    return subscription
+
+def invalidate_subscription(user_id):
+    subscription_cache.delete(user_id)
+
+def current_subscription():
+    """Subscription of the requesting user.
+
+    A token saying the user is not premium is trusted as is. A premium claim is
+    confirmed against the cached row, so a cancellation or expiry takes effect
+    for tokens issued before it within SUBSCRIPTION_CACHE_TTL, not when the
+    token itself expires.
+    """
+    subscription = Subscription.from_claims(get_jwt())
+    if subscription is None or subscription.is_premium():
+        subscription = get_subscription(int(get_jwt_identity()))
+    return subscription
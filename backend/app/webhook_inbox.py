@@ -0,0 +1,165 @@
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.background import PeriodicWorker
+from app.leases import acquire_lease, release_lease
+from app.models import User, Payment, WebhookInbox
+from app.stats import LatencyWindow, register_stats
+from app.subscriptions import invalidate_subscription
+from config import Config
+
+# One process drains the inbox at a time, renewing the lease before each batch
+DRAIN_LEASE = 'webhook-inbox'
+DRAIN_LEASE_SECONDS = 300
+
+_counters = {'received': 0, 'duplicates': 0, 'processed': 0, 'skipped': 0, 'failed': 0, 'drains_skipped': 0}
+_counters_lock = threading.Lock()
+# Time from receipt to processing of each drained webhook
+_processing_lag = LatencyWindow()
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+def enqueue_webhook(event, reference, payload):
+    """Store a verified webhook payload; returns False if its reference was already received"""
+    db.session.add(WebhookInbox(reference=reference, event=event, payload=payload))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        _count('duplicates')
+        return False
+    _count('received')
+    return True
+
+def _apply_charge_success(transaction_data):
+    """Record a successful charge and extend the subscription.
+
+    Returns the user id it applied to, or a string saying why the event was skipped.
+    """
+    reference = transaction_data['reference']
+
+    # The unique paystack_reference makes replays (and verify-payment racing us) no-ops
+    if Payment.query.filter_by(paystack_reference=reference).first():
+        return 'already processed'
+
+    # Find user by email (Paystack sends customer email)
+    customer_email = (transaction_data.get('customer') or {}).get('email')
+    if not customer_email:
+        return 'no customer email'
+
+    user = User.query.filter_by(email=customer_email).first()
+    if not user:
+        return f'no user with email {customer_email}'
+
+    # Create payment record
+    payment = Payment(
+        user_id=user.id,
+        paystack_reference=reference,
+        amount=transaction_data['amount'],
+        currency=transaction_data['currency'],
+        status='success',
+        payment_metadata=transaction_data
+    )
+
+    # Update user subscription
+    user.subscription_status = 'premium'
+    user.subscription_expires_at = datetime.utcnow() + timedelta(days=30)
+
+    db.session.add(payment)
+    return user.id
+
+def process_webhook_inbox(batch_size=None):
+    """Apply pending inbox rows in id order, one transaction per batch.
+
+    Only the holder of the webhook-inbox lease drains, so each row is applied
+    by one process on SQLite as well as MySQL. Each row runs in a savepoint; a
+    failing row is retried on later runs until WEBHOOK_INBOX_MAX_ATTEMPTS,
+    without holding up the rest of the batch. Returns the number of rows handled.
+    """
+    if not acquire_lease(DRAIN_LEASE, DRAIN_LEASE_SECONDS):
+        _count('drains_skipped')
+        return 0
+    try:
+        return _drain(batch_size or Config.WEBHOOK_INBOX_BATCH_SIZE)
+    finally:
+        release_lease(DRAIN_LEASE)
+
+def _drain(batch_size):
+    total = 0
+    last_id = 0
+    while True:
+        rows = WebhookInbox.query.filter(
+            WebhookInbox.processed_at.is_(None),
+            WebhookInbox.id > last_id,
+            WebhookInbox.attempts < Config.WEBHOOK_INBOX_MAX_ATTEMPTS
+        ).order_by(WebhookInbox.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        applied_users = []
+        for row in rows:
+            # Flushed outside the savepoint so a failed attempt is still counted
+            row.attempts += 1
+            db.session.flush()
+            try:
+                with db.session.begin_nested():
+                    outcome = _apply_charge_success(row.payload['data'])
+            except Exception as e:
+                row.last_error = str(e)
+                _count('failed')
+                current_app.logger.error(f"Webhook {row.reference} failed (attempt {row.attempts}): {e}")
+                continue
+
+            row.processed_at = datetime.utcnow()
+            _processing_lag.record((row.processed_at - row.received_at).total_seconds())
+            if isinstance(outcome, str):
+                row.last_error = outcome
+                _count('skipped')
+            else:
+                applied_users.append(outcome)
+                _count('processed')
+                current_app.logger.info(f"Payment processed successfully for user {outcome}")
+
+        db.session.commit()
+        for user_id in applied_users:
+            invalidate_subscription(user_id)
+
+        total += len(rows)
+        last_id = rows[-1].id
+        if len(rows) < batch_size or not acquire_lease(DRAIN_LEASE, DRAIN_LEASE_SECONDS):
+            break
+    return total
+
+inbox_worker = PeriodicWorker('webhook-inbox', process_webhook_inbox, interval=Config.WEBHOOK_INBOX_INTERVAL)
+
+def install_webhook_inbox_worker(app):
+    """Drain the inbox on a background thread in each worker process that serves requests"""
+    if not app.config.get('WEBHOOK_INBOX_WORKER_ENABLED'):
+        return
+
+    @app.before_request
+    def start_webhook_inbox_worker():
+        if not inbox_worker.is_running():
+            inbox_worker.start(app)
+
+def webhook_inbox_stats():
+    with _counters_lock:
+        stats = dict(_counters)
+
+    # Inbox lag: how many webhooks wait and how long the oldest has waited
+    unprocessed = WebhookInbox.query.filter(WebhookInbox.processed_at.is_(None))
+    pending = unprocessed.filter(WebhookInbox.attempts < Config.WEBHOOK_INBOX_MAX_ATTEMPTS)
+    oldest = pending.order_by(WebhookInbox.id).with_entities(WebhookInbox.received_at).first()
+    stats['pending'] = pending.count()
+    # Rows that used up their attempts and need a look
+    stats['dead'] = unprocessed.filter(WebhookInbox.attempts >= Config.WEBHOOK_INBOX_MAX_ATTEMPTS).count()
+    stats['lag_seconds'] = round((datetime.utcnow() - oldest.received_at).total_seconds(), 1) if oldest else 0.0
+    stats['processing_lag_ms'] = _processing_lag.summary()
+    stats['worker'] = inbox_worker.stats()
+    return stats
+
+register_stats('webhook_inbox', webhook_inbox_stats)
@@ -0,0 +1,111 @@
+"""Local stand-in for the OpenAI chat completions API, for offline load tests.
+
+Answers POST /v1/chat/completions after a configurable delay, as one JSON body
+or, with "stream": true, as server-sent chunks spaced --token-ms apart.
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:8901/v1.
+
+    python benchmarks/fake_openai.py --latency-ms 500 --token-ms 20
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETIONS_PATH = '/v1/chat/completions'
+
+REPLY = "You are doing better than you think, one small step at a time."
+
+class FakeOpenAI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0, jitter_ms=0, token_ms=0, reply=REPLY):
+        super().__init__(address, FakeOpenAIHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_ms = token_ms
+        self.reply = reply
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunk(self, data):
+        payload = f"data: {data}\n\n".encode('utf-8')
+        self.wfile.write(f"{len(payload):x}\r\n".encode('ascii') + payload + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.path != COMPLETIONS_PATH:
+            self.send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+            return
+
+        server.count()
+        delay = max(0.0, server.latency_ms + random.uniform(-server.jitter_ms, server.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        completion_id = f"chatcmpl-fake{random.randrange(10 ** 9)}"
+        common = {'id': completion_id, 'created': int(time.time()), 'model': request.get('model', 'gpt-3.5-turbo')}
+        if not request.get('stream'):
+            self.send_json(200, dict(common, object='chat.completion', choices=[{
+                'index': 0, 'message': {'role': 'assistant', 'content': server.reply}, 'finish_reason': 'stop'
+            }], usage={'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        words = server.reply.split(' ')
+        for index, word in enumerate(words):
+            if index:
+                time.sleep(server.token_ms / 1000)
+            delta = {'content': word if index == len(words) - 1 else word + ' '}
+            self.send_chunk(json.dumps(dict(common, object='chat.completion.chunk', choices=[
+                {'index': 0, 'delta': delta, 'finish_reason': None}
+            ])))
+        self.send_chunk('[DONE]')
+        self.wfile.write(b"0\r\n\r\n")
+
+def start_fake_openai(port=0, **options):
+    """Serve the fake API on a background thread; returns the server (see .server_port)"""
+    server = FakeOpenAI(('127.0.0.1', port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--latency-ms', type=float, default=500, help='delay before the response (first token)')
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--token-ms', type=float, default=20, help='delay between streamed chunks')
+    args = parser.parse_args()
+
+    server = FakeOpenAI(('127.0.0.1', args.port), args.latency_ms, args.jitter_ms, args.token_ms)
+    print(f"Fake OpenAI listening on http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{server.requests} requests")
+
+if __name__ == '__main__':
+    main()
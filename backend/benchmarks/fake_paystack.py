@@ -0,0 +1,103 @@
+"""Local stand-in for the Paystack API, for offline load tests of the payment paths.
+
+Answers GET /transaction/verify/<reference> with a successful transaction after a
+configurable delay, failing a configurable share of requests with HTTP 500.
+Point the backend at it with PAYSTACK_BASE_URL=http://127.0.0.1:8900.
+
+    python benchmarks/fake_paystack.py --latency-ms 200 --jitter-ms 50 --failure-rate 0.05
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VERIFY_PATH = re.compile(r'^/transaction/verify/([^/?]+)$')
+
+class FakePaystack(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0, jitter_ms=0, failure_rate=0.0, amount=500000, currency='NGN'):
+        super().__init__(address, FakePaystackHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.amount = amount
+        self.currency = currency
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def count(self, failed):
+        with self._lock:
+            self.requests += 1
+            if failed:
+                self.failures += 1
+
+class FakePaystackHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        delay = max(0.0, server.latency_ms + random.uniform(-server.jitter_ms, server.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        match = VERIFY_PATH.match(self.path)
+        if not match:
+            server.count(failed=True)
+            self.send_json(404, {'status': False, 'message': 'Not found'})
+            return
+        if random.random() < server.failure_rate:
+            server.count(failed=True)
+            self.send_json(500, {'status': False, 'message': 'Simulated failure'})
+            return
+
+        server.count(failed=False)
+        self.send_json(200, {
+            'status': True,
+            'message': 'Verification successful',
+            'data': {
+                'reference': match.group(1),
+                'status': 'success',
+                'amount': server.amount,
+                'currency': server.currency,
+                'customer': {'email': 'customer@example.com'},
+            }
+        })
+
+def start_fake_paystack(port=0, **options):
+    """Serve the fake API on a background thread; returns the server (see .server_port)"""
+    server = FakePaystack(('127.0.0.1', port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='share of requests answered with HTTP 500')
+    args = parser.parse_args()
+
+    server = FakePaystack(('127.0.0.1', args.port), args.latency_ms, args.jitter_ms, args.failure_rate)
+    print(f"Fake Paystack listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{server.requests} requests, {server.failures} failures")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""Throughput of gunicorn.conf.py worker classes against slow upstream stand-ins.
+
+For each mode it starts `gunicorn -c gunicorn.conf.py run:app` with
+GUNICORN_WORKER_CLASS set, backed by a scratch SQLite database and by
+benchmarks/fake_openai.py and benchmarks/fake_paystack.py, then runs concurrent
+clients mixing an upstream-bound payment verification, a streamed affirmation
+and a cheap /health check. Modes whose worker class is not installed (gevent)
+are skipped.
+
+    python benchmarks/gunicorn_load.py
+    python benchmarks/gunicorn_load.py --modes gthread,gevent --clients 64 --openai-latency-ms 800
+"""
+import argparse
+import itertools
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_CLASS_MODULES = {'sync': None, 'gthread': None, 'gevent': 'gevent'}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def available(mode):
+    module = WORKER_CLASS_MODULES.get(mode)
+    if module is None:
+        return mode in WORKER_CLASS_MODULES
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+def start_gunicorn(mode, args, upstreams):
+    openai_server, paystack_server = upstreams
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        'PORT': str(port),
+        'GUNICORN_WORKER_CLASS': mode,
+        'WEB_CONCURRENCY': str(args.workers),
+        'DATABASE_URL': 'sqlite:///' + os.path.join(tempfile.mkdtemp(), f'{mode}.db'),
+        'OPENAI_API_KEY': 'sk-fake',
+        'OPENAI_BASE_URL': f"http://127.0.0.1:{openai_server.server_port}/v1",
+        'PAYSTACK_SECRET_KEY': 'sk_test_load',
+        'PAYSTACK_BASE_URL': f"http://127.0.0.1:{paystack_server.server_port}",
+        'BCRYPT_ROUNDS': '4',
+        'CONTENT_POOL_REFILL_ENABLED': 'false',
+        'SUBSCRIPTION_EXPIRY_SWEEP_ENABLED': 'false',
+        'EMAIL_OUTBOX_WORKER_ENABLED': 'false',
+    })
+    if args.threads:
+        env['GUNICORN_THREADS'] = str(args.threads)
+    subprocess.run([sys.executable, 'init_db.py', 'migrate'], cwd=BACKEND, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+def wait_until_up(requests, base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not answer on {base_url}")
+
+def register_users(requests, base_url, count):
+    run = uuid.uuid4().hex[:8]
+    headers = []
+    for index in range(count):
+        username = f"gload_{run}_{index}"
+        response = requests.post(f"{base_url}/api/auth/register", json={
+            'username': username, 'email': f"{username}@example.com", 'password': 'load-password'
+        })
+        response.raise_for_status()
+        headers.append({'Authorization': f"Bearer {response.json()['access_token']}"})
+    return headers
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def run_mode(requests, mode, args, upstreams):
+    process, base_url = start_gunicorn(mode, args, upstreams)
+    try:
+        wait_until_up(requests, base_url)
+        users = register_users(requests, base_url, args.users)
+        results = defaultdict(list)
+        lock = threading.Lock()
+
+        routes = [
+            ('verify-payment', lambda session, headers: session.post(
+                f"{base_url}/api/payment/verify-payment",
+                json={'reference': f"gload-{uuid.uuid4().hex}"}, headers=headers)),
+            ('affirmation-stream', lambda session, headers: session.get(
+                f"{base_url}/api/ai/affirmation?stream=true", headers=headers)),
+            ('health', lambda session, headers: session.get(f"{base_url}/health")),
+        ]
+
+        def client(deadline, offset):
+            session = requests.Session()
+            for index in itertools.count(offset):
+                if time.monotonic() >= deadline:
+                    return
+                name, call = routes[index % len(routes)]
+                start = time.perf_counter()
+                try:
+                    status = call(session, users[index % len(users)]).status_code
+                except requests.RequestException:
+                    status = 'error'
+                with lock:
+                    results[name].append((status, time.perf_counter() - start))
+
+        deadline = time.monotonic() + args.duration
+        threads = [threading.Thread(target=client, args=(deadline, index)) for index in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+    total = sum(len(samples) for samples in results.values())
+    print(f"{mode}: {total / args.duration:.1f} requests/s")
+    for name, _ in routes:
+        samples = results[name]
+        latencies = sorted(latency for _, latency in samples)
+        statuses = Counter(status for status, _ in samples)
+        print(f"  {name:<20} {len(samples) / args.duration:6.1f}/s  p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  "
+              f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  statuses {dict(statuses)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='sync,gthread,gevent', help='comma-separated worker classes')
+    parser.add_argument('--workers', type=int, default=2, help='WEB_CONCURRENCY for every mode')
+    parser.add_argument('--threads', type=int, help='GUNICORN_THREADS for gthread')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per mode')
+    parser.add_argument('--openai-latency-ms', type=float, default=300)
+    parser.add_argument('--token-ms', type=float, default=10)
+    parser.add_argument('--paystack-latency-ms', type=float, default=200)
+    args = parser.parse_args()
+
+    import requests
+    from fake_openai import start_fake_openai
+    from fake_paystack import start_fake_paystack
+    upstreams = (
+        start_fake_openai(latency_ms=args.openai_latency_ms, token_ms=args.token_ms),
+        start_fake_paystack(latency_ms=args.paystack_latency_ms),
+    )
+
+    for mode in args.modes.split(','):
+        if not available(mode):
+            print(f"{mode}: skipped (worker class not installed)")
+            continue
+        run_mode(requests, mode, args, upstreams)
+
+if __name__ == '__main__':
+    main()
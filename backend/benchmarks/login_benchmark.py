@@ -0,0 +1,113 @@
+"""Login throughput next to the latency of a cheap endpoint under the same load.
+
+Runs login and /api/mood/log clients concurrently and reports logins/second,
+503 rejections and mood-log latency percentiles. By default it serves the app
+in-process on a scratch SQLite database; pass --url to load an already
+running server (e.g. gunicorn) that has the benchmark user registered.
+
+    python benchmarks/login_benchmark.py                   # pooled hashing (PASSWORD_HASH_WORKERS)
+    python benchmarks/login_benchmark.py --workers 0       # inline bcrypt, for comparison
+    python benchmarks/login_benchmark.py --url http://127.0.0.1:5001 --duration 30
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+USERNAME = 'bench_user'
+PASSWORD = 'bench-password'
+
+def start_local_server(workers, rounds):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['SENTIMENT_ASYNC'] = 'false'
+    os.environ['CONTENT_POOL_REFILL_ENABLED'] = 'false'
+    if workers is not None:
+        os.environ['PASSWORD_HASH_WORKERS'] = str(workers)
+    if rounds is not None:
+        os.environ['BCRYPT_ROUNDS'] = str(rounds)
+
+    from werkzeug.serving import make_server
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def run_clients(count, target, deadline):
+    threads = [threading.Thread(target=target, args=(deadline,)) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='server to load instead of an in-process one')
+    parser.add_argument('--workers', type=int, help='PASSWORD_HASH_WORKERS for the in-process server')
+    parser.add_argument('--rounds', type=int, help='BCRYPT_ROUNDS for the in-process server')
+    parser.add_argument('--login-clients', type=int, default=16)
+    parser.add_argument('--mood-clients', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds')
+    args = parser.parse_args()
+
+    import requests
+    base_url = args.url or start_local_server(args.workers, args.rounds)
+
+    requests.post(f"{base_url}/api/auth/register", json={
+        'username': USERNAME, 'email': 'bench@example.com', 'password': PASSWORD
+    })
+    response = requests.post(f"{base_url}/api/auth/login", json={'username': USERNAME, 'password': PASSWORD})
+    response.raise_for_status()
+    headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+    results = {'logins': 0, 'rejected': 0, 'errors': 0, 'mood_latencies': []}
+    lock = threading.Lock()
+
+    def login_client(deadline):
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            response = session.post(f"{base_url}/api/auth/login", json={'username': USERNAME, 'password': PASSWORD})
+            key = {200: 'logins', 503: 'rejected'}.get(response.status_code, 'errors')
+            with lock:
+                results[key] += 1
+            if response.status_code == 503:
+                time.sleep(float(response.headers.get('Retry-After', 1)))
+
+    def mood_client(deadline):
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            response = session.post(f"{base_url}/api/mood/log", json={'mood': 3}, headers=headers)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 201:
+                    results['mood_latencies'].append(elapsed)
+                else:
+                    results['errors'] += 1
+
+    deadline = time.monotonic() + args.duration
+    threads = run_clients(args.login_clients, login_client, deadline)
+    threads += run_clients(args.mood_clients, mood_client, deadline)
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(results['mood_latencies'])
+    print(f"Logins: {results['logins']} ok ({results['logins'] / args.duration:.1f}/s), "
+          f"{results['rejected']} rejected with 503, {results['errors']} errors")
+    print(f"Mood log: {len(latencies)} requests ({len(latencies) / args.duration:.1f}/s), "
+          f"p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+          f"max {percentile(latencies, 1.0) * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
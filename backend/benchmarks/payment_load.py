@@ -0,0 +1,149 @@
+"""Load the payment verify and webhook paths against the fake Paystack server.
+
+By default it starts benchmarks/fake_paystack.py and the app in-process on a
+scratch SQLite database. Pass --url to load a running backend instead; it must
+have PAYSTACK_BASE_URL pointing at a fake server and the same
+PAYSTACK_SECRET_KEY as this script (used to sign webhooks).
+
+    python benchmarks/payment_load.py --latency-ms 200 --failure-rate 0.1
+    python benchmarks/payment_load.py --url http://127.0.0.1:5001 --duration 30
+"""
+import argparse
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SECRET_KEY = os.environ.setdefault('PAYSTACK_SECRET_KEY', 'sk_test_load')
+
+def start_local_stack(args):
+    from fake_paystack import start_fake_paystack
+    paystack = start_fake_paystack(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, failure_rate=args.failure_rate
+    )
+
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'payment_load.db')
+    os.environ['PAYSTACK_BASE_URL'] = f"http://127.0.0.1:{paystack.server_port}"
+    os.environ.setdefault('BCRYPT_ROUNDS', '4')
+    os.environ['CONTENT_POOL_REFILL_ENABLED'] = 'false'
+
+    from werkzeug.serving import make_server
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", paystack
+
+def register_users(requests, base_url, count):
+    run = uuid.uuid4().hex[:8]
+    users = []
+    for index in range(count):
+        username = f"load_{run}_{index}"
+        email = f"{username}@example.com"
+        response = requests.post(f"{base_url}/api/auth/register", json={
+            'username': username, 'email': email, 'password': 'load-password'
+        })
+        response.raise_for_status()
+        users.append((email, {'Authorization': f"Bearer {response.json()['access_token']}"}))
+    return users
+
+def new_reference():
+    return f"load-{uuid.uuid4().hex}"
+
+def sign(payload):
+    return hmac.new(SECRET_KEY.encode('utf-8'), payload, hashlib.sha512).hexdigest()
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def report(name, results, duration):
+    latencies = sorted(latency for _, latency in results)
+    statuses = Counter(status for status, _ in results)
+    print(f"{name}: {len(results)} requests ({len(results) / duration:.1f}/s), "
+          f"p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+          f"max {percentile(latencies, 1.0) * 1000:.1f} ms, statuses {dict(sorted(statuses.items()))}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='backend to load instead of an in-process one')
+    parser.add_argument('--latency-ms', type=float, default=100, help='fake Paystack latency (in-process mode)')
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--verify-clients', type=int, default=8)
+    parser.add_argument('--webhook-clients', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds')
+    args = parser.parse_args()
+
+    import requests
+    paystack = None
+    if args.url:
+        base_url = args.url
+    else:
+        base_url, paystack = start_local_stack(args)
+
+    users = register_users(requests, base_url, args.users)
+    verify_results, webhook_results = [], []
+    lock = threading.Lock()
+
+    def verify_client(deadline, offset):
+        session = requests.Session()
+        for _, headers in itertools.islice(itertools.cycle(users), offset, None):
+            if time.monotonic() >= deadline:
+                return
+            start = time.perf_counter()
+            response = session.post(f"{base_url}/api/payment/verify-payment",
+                                    json={'reference': new_reference()}, headers=headers)
+            with lock:
+                verify_results.append((response.status_code, time.perf_counter() - start))
+
+    def webhook_client(deadline, offset):
+        session = requests.Session()
+        for email, _ in itertools.islice(itertools.cycle(users), offset, None):
+            if time.monotonic() >= deadline:
+                return
+            payload = json.dumps({'event': 'charge.success', 'data': {
+                'reference': new_reference(), 'amount': 500000, 'currency': 'NGN', 'customer': {'email': email}
+            }}).encode('utf-8')
+            start = time.perf_counter()
+            response = session.post(f"{base_url}/api/payment/webhook", data=payload, headers={
+                'Content-Type': 'application/json', 'X-Paystack-Signature': sign(payload)
+            })
+            with lock:
+                webhook_results.append((response.status_code, time.perf_counter() - start))
+
+    deadline = time.monotonic() + args.duration
+    threads = [threading.Thread(target=verify_client, args=(deadline, index)) for index in range(args.verify_clients)]
+    threads += [threading.Thread(target=webhook_client, args=(deadline, index)) for index in range(args.webhook_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report('verify-payment', verify_results, args.duration)
+    report('webhook', webhook_results, args.duration)
+    if paystack is not None:
+        print(f"Fake Paystack: {paystack.requests} requests, {paystack.failures} failures")
+    stats = requests.get(f"{base_url}/stats").json()
+    if 'paystack' in stats:
+        print(f"Backend Paystack client: {stats['paystack']}")
+    if 'webhook_inbox' in stats:
+        print(f"Webhook inbox: {stats['webhook_inbox']}")
+
+if __name__ == '__main__':
+    main()
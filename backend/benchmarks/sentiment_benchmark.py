@@ -0,0 +1,112 @@
+"""Latency and agreement of the local lexicon sentiment classifier.
+
+    python benchmarks/sentiment_benchmark.py          # local classifier vs. sample labels
+    python benchmarks/sentiment_benchmark.py --llm    # also compare with OpenAI (needs OPENAI_API_KEY)
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.sentiment_lexicon import classify, classify_batch
+
+# Hand-labelled journal-style sample
+SAMPLE = [
+    ("Had a wonderful walk in the park and felt truly grateful for the sunshine.", 'positive'),
+    ("I finally finished the project and I'm so proud of myself.", 'positive'),
+    ("Spent the evening laughing with friends, it was the best night in weeks.", 'positive'),
+    ("Meditation this morning left me calm and focused for the whole day.", 'positive'),
+    ("Slept well, ate healthy and feel energized.", 'positive'),
+    ("My therapist session helped a lot, I feel hopeful again.", 'positive'),
+    ("Grateful for my family and the small wins this week.", 'positive'),
+    ("Today was a good day, nothing special but I enjoyed it.", 'positive'),
+    ("I feel relaxed and content after the weekend away.", 'positive'),
+    ("Got great feedback at work and I'm excited about what's next.", 'positive'),
+    ("I feel completely overwhelmed and exhausted by everything.", 'negative'),
+    ("Another sleepless night, the anxiety is getting worse.", 'negative'),
+    ("I cried for most of the afternoon and I don't know why.", 'negative'),
+    ("Work was terrible and my manager made me feel worthless.", 'negative'),
+    ("I'm lonely and nobody seems to notice.", 'negative'),
+    ("Everything feels hopeless right now.", 'negative'),
+    ("I'm stressed about money and can't focus on anything.", 'negative'),
+    ("Had a panic attack on the train, it was awful.", 'negative'),
+    ("I am not happy with how I handled the argument.", 'negative'),
+    ("Felt sad and tired all day.", 'negative'),
+    ("Went to the grocery store and then cooked dinner.", 'neutral'),
+    ("Worked from home today, had three meetings.", 'neutral'),
+    ("Read a few chapters of a book before bed.", 'neutral'),
+    ("Took the bus to the city center in the afternoon.", 'neutral'),
+    ("Cleaned the kitchen and did laundry.", 'neutral'),
+    ("Called my sister to plan the weekend.", 'neutral'),
+    ("The weather was cloudy and the office was quiet.", 'neutral'),
+    ("Watched a documentary about oceans.", 'neutral'),
+    ("Got the promotion, which is great, but I'm anxious about the new responsibilities.", 'mixed'),
+    ("The trip was beautiful but I felt lonely most of the time.", 'mixed'),
+    ("Happy to be home, though still exhausted and stressed about work.", 'mixed'),
+    ("I love my new job but the commute is awful.", 'mixed'),
+    ("Proud of my progress, yet I'm worried I'll fail the exam.", 'mixed'),
+    ("Good session at the gym, bad news from the doctor.", 'mixed'),
+    ("I don't feel sad anymore.", 'positive'),
+    ("Not a bad day at all.", 'positive'),
+    ("I never feel relaxed at work.", 'negative'),
+    ("Nothing went well today and I am frustrated.", 'negative'),
+    ("Great, another Monday of pointless meetings.", 'negative'),
+    ("I guess things are fine, whatever.", 'neutral'),
+    ("My dog passed away this morning.", 'negative'),
+    ("Could have been worse, could have been better.", 'mixed'),
+]
+
+def time_per_entry(texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            classify(text)
+    single = (time.perf_counter() - start) / (repeat * len(texts))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        classify_batch(texts)
+    batched = (time.perf_counter() - start) / (repeat * len(texts))
+    return single, batched
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--llm', action='store_true', help='compare with OpenAI on the sample')
+    args = parser.parse_args()
+
+    texts = [text for text, _ in SAMPLE]
+    labels = [label for _, label in SAMPLE]
+
+    single, batched = time_per_entry(texts, args.repeat)
+    print(f"Local classifier latency: {single * 1e6:.1f} us/entry single, {batched * 1e6:.1f} us/entry batched")
+
+    predictions = classify_batch(texts)
+    correct = sum(1 for (label, _), expected in zip(predictions, labels) if label == expected)
+    print(f"Agreement with sample labels: {correct}/{len(SAMPLE)} ({correct / len(SAMPLE):.0%})")
+
+    from config import Config
+    threshold = Config.SENTIMENT_LOCAL_CONFIDENCE
+    confident = [(label, expected) for (label, confidence), expected in zip(predictions, labels) if confidence >= threshold]
+    if confident:
+        confident_correct = sum(1 for label, expected in confident if label == expected)
+        print(f"High-confidence (>= {threshold}) coverage: {len(confident)}/{len(SAMPLE)}, "
+              f"agreement {confident_correct}/{len(confident)}")
+
+    if args.llm:
+        from app.ai_integration import _classify_sentiment_with_openai
+        llm_labels = []
+        start = time.perf_counter()
+        for text in texts:
+            llm_labels.append(_classify_sentiment_with_openai(text))
+        llm_latency = (time.perf_counter() - start) / len(texts)
+        agree = sum(1 for (label, _), llm in zip(predictions, llm_labels) if label == llm)
+        llm_correct = sum(1 for llm, expected in zip(llm_labels, labels) if llm == expected)
+        print(f"OpenAI latency: {llm_latency * 1e3:.0f} ms/entry")
+        print(f"OpenAI agreement with sample labels: {llm_correct}/{len(SAMPLE)}")
+        print(f"Local/OpenAI agreement: {agree}/{len(SAMPLE)} ({agree / len(SAMPLE):.0%})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Worker startup cost: cold import of run.py and the first requests it serves.
+
+Each sample is a fresh interpreter, like a newly forked-and-booted gunicorn
+worker without preload: it imports run (which builds the app), then serves a
+first /health and a first authenticated /api/journal/entries through the test
+client. The scratch SQLite database is migrated once beforehand, as a deploy
+would. Also reports whether heavy optional modules were loaded at startup.
+
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+HEAVY_MODULES = ['openai', 'httpx', 'numpy']
+
+CHILD = f"""
+import json, sys, time
+start = time.perf_counter()
+import run
+imported = time.perf_counter() - start
+loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+
+from flask_jwt_extended import create_access_token
+client = run.app.test_client()
+start = time.perf_counter()
+client.get('/health')
+first_health = time.perf_counter() - start
+with run.app.app_context():
+    token = create_access_token(identity='1')
+start = time.perf_counter()
+response = client.get('/api/journal/entries', headers={{'Authorization': 'Bearer ' + token}})
+first_query = time.perf_counter() - start
+print(json.dumps({{'import': imported, 'health': first_health, 'query': first_query,
+                  'status': response.status_code, 'loaded': loaded}}))
+"""
+
+def run_child(env):
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=BACKEND, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def summarise(name, values):
+    values = sorted(values)
+    print(f"{name:<28} median {statistics.median(values) * 1000:7.1f} ms   "
+          f"min {values[0] * 1000:7.1f} ms   max {values[-1] * 1000:7.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'startup.db')
+    # Background workers start on the first request; keep them out of the measurement
+    for flag in ('CONTENT_POOL_REFILL_ENABLED', 'SUBSCRIPTION_EXPIRY_SWEEP_ENABLED',
+                 'WEBHOOK_INBOX_WORKER_ENABLED', 'EMAIL_OUTBOX_WORKER_ENABLED'):
+        env[flag] = 'false'
+    subprocess.run([sys.executable, 'init_db.py', 'migrate'], cwd=BACKEND, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+
+    samples = [run_child(env) for _ in range(args.runs)]
+    print(f"{args.runs} fresh interpreters")
+    summarise('import run (create_app)', [sample['import'] for sample in samples])
+    summarise('first GET /health', [sample['health'] for sample in samples])
+    summarise('first journal list', [sample['query'] for sample in samples])
+    summarise('total', [sample['import'] + sample['health'] + sample['query'] for sample in samples])
+    statuses = sorted({sample['status'] for sample in samples})
+    print(f"journal list statuses: {statuses}")
+    loaded = sorted({name for sample in samples for name in sample['loaded']})
+    print(f"heavy modules loaded at startup: {', '.join(loaded) or 'none'}")
+
+if __name__ == '__main__':
+    main()
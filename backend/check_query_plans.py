@@ -0,0 +1,148 @@
+"""Run every endpoint against a seeded database and EXPLAIN the SQL it issues.
+
+Exits non-zero if any statement falls back to a full table scan. Uses an
+in-memory SQLite database (EXPLAIN QUERY PLAN) unless DATABASE_URL points
+at MySQL, in which case it runs EXPLAIN there. Only point it at a scratch
+database: it creates tables and seeds a test user. OpenAI calls get canned
+answers, so no requests leave the machine.
+
+    python check_query_plans.py
+"""
+import os
+import re
+import sys
+from types import SimpleNamespace
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('SENTIMENT_ASYNC', 'false')
+os.environ.setdefault('CONTENT_POOL_REFILL_ENABLED', 'false')
+os.environ.setdefault('SUBSCRIPTION_EXPIRY_SWEEP_ENABLED', 'false')
+os.environ.setdefault('WEBHOOK_INBOX_WORKER_ENABLED', 'false')
+os.environ.setdefault('EMAIL_OUTBOX_WORKER_ENABLED', 'false')
+
+from sqlalchemy import event
+from app import create_app, db
+from app import openai_client
+from app.search import ensure_search_index
+from app.subscription_expiry import expire_subscriptions
+from app.webhook_inbox import process_webhook_inbox, webhook_inbox_stats
+from app.email_outbox import send_pending_emails, email_outbox_stats
+
+# (method, path, json body) in the order they should be exercised
+ENDPOINTS = [
+    ('POST', '/api/auth/register', {'username': 'plan_user', 'email': 'plan@example.com', 'password': 'secret123'}),
+    ('POST', '/api/auth/login', {'username': 'plan_user', 'password': 'secret123'}),
+    ('GET', '/api/auth/profile', None),
+    ('POST', '/api/mood/log', {'mood': 4, 'notes': 'Calm day'}),
+    ('GET', '/api/mood/history?days=30', None),
+    ('GET', '/api/mood/stats?days=30', None),
+    ('POST', '/api/journal/entry', {'title': 'Query plans', 'content': 'Indexes keep these lookups cheap.'}),
+    ('GET', '/api/journal/entries', None),
+    ('GET', '/api/journal/entries?cursor=&limit=5', None),
+    ('GET', '/api/journal/entry/1', None),
+    ('GET', '/api/journal/entry/1/sentiment', None),
+    ('GET', '/api/journal/search?q=indexes', None),
+    ('POST', '/api/habits/create', {'name': 'Water', 'goal': 8, 'unit': 'glasses'}),
+    ('POST', '/api/habits/log', {'habit_id': 1, 'value': 2}),
+    ('GET', '/api/habits/list', None),
+    ('GET', '/api/dashboard/summary', None),
+    ('GET', '/api/ai/affirmation', None),
+    ('GET', '/api/ai/journal-prompt?mood=3', None),
+    ('GET', '/api/payment/subscription-status', None),
+    ('GET', '/api/payment/payment-history', None),
+]
+
+# Background jobs run after the endpoints, as (name, function called in the app context)
+JOBS = [
+    ('expire_subscriptions', expire_subscriptions),
+    ('process_webhook_inbox', process_webhook_inbox),
+    ('webhook_inbox_stats', webhook_inbox_stats),
+    ('send_pending_emails', send_pending_emails),
+    ('email_outbox_stats', email_outbox_stats),
+]
+
+# \b stops the name backtracking to a prefix ("journa") that dodges the lookahead
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)\b(?! USING (COVERING )?INDEX)')
+
+class OfflineOpenAI:
+    """Stands in for the OpenAI client so the check never leaves the machine"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, messages, **kwargs):
+        message = SimpleNamespace(content='neutral')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def capture_statements(engine):
+    """Record SELECT/UPDATE/DELETE statements executed on the engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+def full_scans(conn, statement, parameters, tables):
+    """Return the model tables a statement reads with a full scan"""
+    if conn.dialect.name == 'sqlite':
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+        scans = [SQLITE_SCAN.match(row[-1]) for row in rows]
+        return [match.group(1) for match in scans if match and match.group(1) in tables]
+    rows = conn.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings().fetchall()
+    return [row['table'] for row in rows if row['type'] == 'ALL' and row['table'] in tables]
+
+def check_statements(label, checked, tables):
+    failures = []
+    with db.engine.connect() as conn:
+        for statement, parameters in checked:
+            for table in full_scans(conn, statement, parameters, tables):
+                failures.append(f'{label}: full scan of {table}\n    {" ".join(statement.split())}')
+    print(f'{label}: {len(checked)} statements checked')
+    return failures
+
+def main():
+    # Sentiment and content generation still run, with canned completions
+    offline = OfflineOpenAI()
+    openai_client.get_client = lambda: offline
+    app = create_app()
+    failures = []
+
+    with app.app_context():
+        db.create_all()
+        ensure_search_index()
+        tables = set(db.metadata.tables)
+        client = app.test_client()
+        headers = {}
+        statements = capture_statements(db.engine)
+
+        for method, path, body in ENDPOINTS:
+            del statements[:]
+            response = client.open(path, method=method, json=body, headers=headers)
+            checked = list(statements)
+
+            if response.status_code >= 400:
+                failures.append(f'{method} {path}: HTTP {response.status_code} {response.get_data(as_text=True)}')
+                continue
+            if 'access_token' in (response.get_json(silent=True) or {}):
+                headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+            failures.extend(check_statements(f'{method} {path}', checked, tables))
+
+        for name, job in JOBS:
+            del statements[:]
+            job()
+            failures.extend(check_statements(name, list(statements), tables))
+
+    if failures:
+        print('\nQuery plan check failed:')
+        for failure in failures:
+            print(f'  {failure}')
+        return 1
+    print('\nNo full table scans found')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
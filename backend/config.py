@@ -6,7 +6,6 @@ class Config:
     
     # Database configuration - explicitly use Railway's DATABASE_URL
     DATABASE_URL = os.environ.get('DATABASE_URL')
-    print(f"DEBUG: DATABASE_URL from env: {DATABASE_URL}")
     
     if DATABASE_URL:
         # Force SQLAlchemy to use PyMySQL instead of MySQLdb
@@ -14,14 +13,129 @@ class Config:
             SQLALCHEMY_DATABASE_URI = DATABASE_URL.replace('mysql://', 'mysql+pymysql://', 1)
         else:
             SQLALCHEMY_DATABASE_URI = DATABASE_URL
-        print(f"DEBUG: Using DATABASE_URL: {SQLALCHEMY_DATABASE_URI}")
     else:
         SQLALCHEMY_DATABASE_URI = 'sqlite:///app.db'
-        print(f"DEBUG: Using fallback SQLite: {SQLALCHEMY_DATABASE_URI}")
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Engine profile for server databases (see app/db_engine.py); per worker process
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 280))  # seconds; below the server's idle timeout
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    # SQLite files use WAL journaling with synchronous=NORMAL
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'true').lower() == 'true'
+    
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your-jwt-secret-here'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY') or 'your-openai-api-key-here'
     PAYSTACK_SECRET_KEY = os.environ.get('PAYSTACK_SECRET_KEY') or 'your-paystack-secret-key-here'
-    PAYSTACK_PUBLIC_KEY = os.environ.get('PAYSTACK_PUBLIC_KEY') or 'your-paystack-public-key-here'
\ No newline at end of file
+    PAYSTACK_PUBLIC_KEY = os.environ.get('PAYSTACK_PUBLIC_KEY') or 'your-paystack-public-key-here'
+    
+    # /stats and /metrics answer requests from these addresses, or with `Authorization: Bearer <OPS_TOKEN>`
+    OPS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('OPS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+    OPS_TOKEN = os.environ.get('OPS_TOKEN')
+    
+    # Per-process dashboard summary cache
+    DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', 2048))
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 60))  # seconds
+    
+    # Journal sentiment is analyzed after the entry is saved, on a background thread pool
+    SENTIMENT_ASYNC = os.environ.get('SENTIMENT_ASYNC', 'true').lower() == 'true'
+    SENTIMENT_WORKERS = int(os.environ.get('SENTIMENT_WORKERS', 2))
+    SENTIMENT_QUEUE_LIMIT = int(os.environ.get('SENTIMENT_QUEUE_LIMIT', 100))  # waiting entries before new ones stay pending
+    
+    # Sentiment results cached by normalized-text hash: in memory, plus an optional DB table
+    SENTIMENT_CACHE_MAX_ENTRIES = int(os.environ.get('SENTIMENT_CACHE_MAX_ENTRIES', 10000))
+    SENTIMENT_CACHE_PERSISTENT = os.environ.get('SENTIMENT_CACHE_PERSISTENT', 'true').lower() == 'true'
+    
+    # Sentiment engine: 'tiered' (local lexicon first, OpenAI when unsure), 'local' or 'llm'
+    SENTIMENT_MODE = os.environ.get('SENTIMENT_MODE', 'tiered')
+    SENTIMENT_LOCAL_CONFIDENCE = float(os.environ.get('SENTIMENT_LOCAL_CONFIDENCE', 0.75))
+    
+    # Batched OpenAI sentiment calls
+    SENTIMENT_BATCH_MAX_TEXTS = int(os.environ.get('SENTIMENT_BATCH_MAX_TEXTS', 100))  # per request
+    SENTIMENT_BATCH_MAX_ITEMS = int(os.environ.get('SENTIMENT_BATCH_MAX_ITEMS', 50))  # per completion
+    SENTIMENT_BATCH_TOKEN_BUDGET = int(os.environ.get('SENTIMENT_BATCH_TOKEN_BUDGET', 3000))  # prompt tokens per completion
+    SENTIMENT_MICROBATCH_WINDOW_MS = int(os.environ.get('SENTIMENT_MICROBATCH_WINDOW_MS', 5))  # 0 disables
+    
+    # Pre-generated affirmation and journal prompt pools
+    CONTENT_POOL_REFILL_ENABLED = os.environ.get('CONTENT_POOL_REFILL_ENABLED', 'true').lower() == 'true'
+    CONTENT_POOL_LOW_WATER = int(os.environ.get('CONTENT_POOL_LOW_WATER', 20))
+    CONTENT_POOL_HIGH_WATER = int(os.environ.get('CONTENT_POOL_HIGH_WATER', 50))
+    CONTENT_POOL_REFILL_INTERVAL = int(os.environ.get('CONTENT_POOL_REFILL_INTERVAL', 300))  # seconds
+    
+    # Shared OpenAI client: timeouts, retries with jittered backoff and a circuit breaker
+    OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL')  # None uses the public API
+    OPENAI_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', 10))  # seconds per attempt
+    OPENAI_CONNECT_TIMEOUT = float(os.environ.get('OPENAI_CONNECT_TIMEOUT', 3))
+    OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', 2))
+    OPENAI_RETRY_BACKOFF = float(os.environ.get('OPENAI_RETRY_BACKOFF', 0.5))  # seconds, doubled per retry
+    OPENAI_RETRY_BACKOFF_MAX = float(os.environ.get('OPENAI_RETRY_BACKOFF_MAX', 4))
+    OPENAI_MAX_CONNECTIONS = int(os.environ.get('OPENAI_MAX_CONNECTIONS', 10))  # per process
+    OPENAI_BREAKER_FAILURES = int(os.environ.get('OPENAI_BREAKER_FAILURES', 5))
+    OPENAI_BREAKER_RESET_SECONDS = int(os.environ.get('OPENAI_BREAKER_RESET_SECONDS', 30))
+    
+    # bcrypt runs in a per-process worker pool; 0 workers hashes inline in the request thread
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT', 8))  # waiting jobs before 503
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))  # seconds
+    PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER', 1))  # seconds, sent with 503
+    
+    # Subscription rows cached per process to confirm premium token claims
+    SUBSCRIPTION_CACHE_MAX_ENTRIES = int(os.environ.get('SUBSCRIPTION_CACHE_MAX_ENTRIES', 10000))
+    SUBSCRIPTION_CACHE_TTL = int(os.environ.get('SUBSCRIPTION_CACHE_TTL', 30))  # seconds
+    
+    # Periodic sweep marking lapsed premium subscriptions as expired
+    SUBSCRIPTION_EXPIRY_SWEEP_ENABLED = os.environ.get('SUBSCRIPTION_EXPIRY_SWEEP_ENABLED', 'true').lower() == 'true'
+    SUBSCRIPTION_EXPIRY_INTERVAL = int(os.environ.get('SUBSCRIPTION_EXPIRY_INTERVAL', 300))  # seconds
+    SUBSCRIPTION_EXPIRY_BATCH_SIZE = int(os.environ.get('SUBSCRIPTION_EXPIRY_BATCH_SIZE', 500))
+    
+    # Paystack API client: pooled keep-alive session with timeouts and retries
+    PAYSTACK_BASE_URL = os.environ.get('PAYSTACK_BASE_URL', 'https://api.paystack.co')
+    PAYSTACK_CONNECT_TIMEOUT = float(os.environ.get('PAYSTACK_CONNECT_TIMEOUT', 3))  # seconds
+    PAYSTACK_READ_TIMEOUT = float(os.environ.get('PAYSTACK_READ_TIMEOUT', 10))  # seconds
+    PAYSTACK_MAX_RETRIES = int(os.environ.get('PAYSTACK_MAX_RETRIES', 2))
+    PAYSTACK_RETRY_BACKOFF = float(os.environ.get('PAYSTACK_RETRY_BACKOFF', 0.3))  # seconds, doubled per retry
+    PAYSTACK_POOL_SIZE = int(os.environ.get('PAYSTACK_POOL_SIZE', 10))  # connections per process
+    
+    # Paystack webhooks are stored in an inbox table and applied by a background worker
+    WEBHOOK_INBOX_WORKER_ENABLED = os.environ.get('WEBHOOK_INBOX_WORKER_ENABLED', 'true').lower() == 'true'
+    WEBHOOK_INBOX_INTERVAL = int(os.environ.get('WEBHOOK_INBOX_INTERVAL', 5))  # seconds between drains
+    WEBHOOK_INBOX_BATCH_SIZE = int(os.environ.get('WEBHOOK_INBOX_BATCH_SIZE', 100))
+    WEBHOOK_INBOX_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_INBOX_MAX_ATTEMPTS', 5))
+    
+    # Outgoing email: rendered into an outbox table and sent by a background worker.
+    # 'smtp' delivers over pooled connections; 'console' prints messages (development)
+    EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'smtp' if os.environ.get('SMTP_USERNAME') else 'console')
+    SMTP_SERVER = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
+    SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
+    SMTP_USERNAME = os.environ.get('SMTP_USERNAME')
+    SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+    SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true'  # STARTTLS
+    SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', 10))  # seconds
+    SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE', 2))  # connections per process
+    SMTP_IDLE_TIMEOUT = int(os.environ.get('SMTP_IDLE_TIMEOUT', 60))  # seconds before an idle connection is closed
+    FROM_EMAIL = os.environ.get('FROM_EMAIL', 'noreply@mindwell.app')
+    FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
+    EMAIL_OUTBOX_WORKER_ENABLED = os.environ.get('EMAIL_OUTBOX_WORKER_ENABLED', 'true').lower() == 'true'
+    EMAIL_OUTBOX_INTERVAL = int(os.environ.get('EMAIL_OUTBOX_INTERVAL', 10))  # seconds between drains
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50))
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 6))
+    EMAIL_RETRY_BACKOFF = int(os.environ.get('EMAIL_RETRY_BACKOFF', 30))  # seconds, doubled per attempt
+    
+    # Prometheus-text /metrics. Under gunicorn each worker writes its values to
+    # METRICS_DIR every METRICS_FLUSH_INTERVAL seconds and /metrics merges them;
+    # without METRICS_DIR only the serving process is reported
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', 5))  # seconds
+    
+    # Opt-in SQL profiler: logs likely N+1 statement patterns and slow queries per request
+    SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER_ENABLED', 'false').lower() == 'true'
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))  # repeats of one statement shape
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 100))
+    # X-Query-Count / X-Query-Time headers from the profiler, never in production
+    SQL_PROFILER_HEADERS = os.environ.get('FLASK_ENV', 'production') != 'production'
\ No newline at end of file
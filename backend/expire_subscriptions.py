@@ -0,0 +1,20 @@
+"""Mark lapsed premium subscriptions as expired.
+
+The web processes run the same sweep every SUBSCRIPTION_EXPIRY_INTERVAL
+seconds unless SUBSCRIPTION_EXPIRY_SWEEP_ENABLED=false; run this from cron
+when the in-process sweep is disabled.
+
+    python expire_subscriptions.py [--batch-size N]
+"""
+import argparse
+from app import create_app
+from app.subscription_expiry import expire_subscriptions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, help='rows updated per statement')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        print(f"Expired {expire_subscriptions(args.batch_size)} subscriptions")
@@ -0,0 +1,83 @@
+"""Gunicorn settings for the MindWell backend: gunicorn -c gunicorn.conf.py run:app
+
+Most request time is spent waiting on MySQL, OpenAI, Paystack or SMTP, so the
+default worker class runs several threads per process instead of gunicorn's
+single-request sync workers. Everything can be overridden from the environment:
+
+    GUNICORN_WORKER_CLASS  gthread (default), gevent (needs `pip install gevent`) or sync
+    WEB_CONCURRENCY        worker processes (default derived from the CPU count)
+    GUNICORN_THREADS       threads per gthread worker
+    GUNICORN_WORKER_CONNECTIONS  concurrent requests per gevent worker
+    GUNICORN_MAX_REQUESTS  requests before a worker is replaced (0 disables)
+
+Each worker process has its own database pool (DB_POOL_SIZE + DB_MAX_OVERFLOW),
+so keep workers x that total under the database's connection limit.
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before the app is preloaded, so the locks and sockets created at
+    # import time are already cooperative when workers fork from this process
+    from gevent import monkey
+    monkey.patch_all()
+
+def _cpu_count():
+    # CPUs this container may use, which can be fewer than the host has
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+_cpus = _cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+
+# Workers share /metrics through per-process files here (see app/metrics.py)
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f"mindwell-metrics-{os.environ.get('PORT', '5001')}"))
+
+if worker_class == 'sync':
+    _default_workers = 2 * _cpus + 1
+else:
+    # Concurrency comes from threads/greenlets; one process per CPU plus a spare
+    _default_workers = _cpus + 1
+workers = int(os.environ.get('WEB_CONCURRENCY', _default_workers))
+threads = int(os.environ.get('GUNICORN_THREADS', min(8, max(4, 2 * _cpus)))) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+# Long enough for a streamed OpenAI completion; gthread and gevent workers keep
+# heartbeating while a request waits, so this mainly bounds sync workers
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Replace workers periodically to bound slow memory growth; the jitter keeps
+# them from all restarting at once. A recycled gthread worker resets the few
+# connections it has accepted but not yet read (gunicorn closes its poller on
+# exit), so under heavy load set GUNICORN_MAX_REQUESTS=0 if those errors matter
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Heartbeat files on tmpfs; a disk-backed /tmp can stall workers in containers
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None  # '-' for stdout
+
+def on_starting(server):
+    """Start metrics from zero; files left by a previous master would be merged in otherwise"""
+    for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], '*.json')):
+        os.remove(path)
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master before the worker uses the pool"""
+    if server.cfg.preload_app:
+        from app.db_engine import dispose_engines_after_fork
+        dispose_engines_after_fork(server.app.wsgi())
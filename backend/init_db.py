@@ -1,12 +1,208 @@
+import argparse
+from datetime import date, datetime, timedelta
+from sqlalchemy import Date, func, insert, inspect, literal, select, text, update
+from sqlalchemy.exc import IntegrityError
 from app import create_app, db
-from app.models import User, Mood, Journal, Habit, HabitLog, Payment
+from app.search import ensure_search_index, rebuild_search_index
+from app.models import User, Mood, MoodDaily, Journal, Habit, HabitLog, Payment, make_excerpt
 
 def init_database():
     app = create_app()
     with app.app_context():
         # Create all tables
         db.create_all()
+        ensure_search_index()
         print("Database tables created successfully!")
 
+def migrate():
+    """One-shot schema setup for deploys: new tables and columns, missing indexes and the search index.
+
+    Run once before the web workers start so they never race each other on DDL.
+    """
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        added = _add_missing_columns()
+        created = _create_missing_indexes()
+        ensure_search_index()
+        print(f"Database schema is up to date ({added} columns added, {created} indexes created)")
+
+def _recompute_mood_daily(user_id, day):
+    """Set one MoodDaily row from the user's Mood rows for that day in a single statement.
+
+    The aggregates are subqueries of the UPDATE (or INSERT), so they are read
+    when the statement runs rather than earlier: a mood logged concurrently,
+    which inserts its row and bumps the rollup in one transaction, is counted
+    exactly once either way.
+    """
+    start = datetime.combine(day, datetime.min.time())
+    in_day = (Mood.user_id == user_id, Mood.created_at >= start,
+              Mood.created_at < start + timedelta(days=1), Mood.mood.between(1, 5))
+    values = {
+        'mood_sum': select(func.coalesce(func.sum(Mood.mood), 0)).where(*in_day).scalar_subquery(),
+        'mood_count': select(func.count(Mood.id)).where(*in_day).scalar_subquery(),
+    }
+    for mood_value in range(1, 6):
+        values[f'count_{mood_value}'] = select(func.count(Mood.id))\
+            .where(*in_day, Mood.mood == mood_value).scalar_subquery()
+
+    refresh = update(MoodDaily)\
+        .where(MoodDaily.user_id == user_id, MoodDaily.date == day)\
+        .values(values)
+    with db.engine.begin() as conn:
+        if conn.execute(refresh).rowcount:
+            return
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(insert(MoodDaily).from_select(
+                ['user_id', 'date'] + list(values),
+                select(literal(user_id), literal(day, Date), *values.values())
+            ))
+    except IntegrityError:
+        # A mood log created the row meanwhile; refresh it instead
+        with db.engine.begin() as conn:
+            conn.execute(refresh)
+
+def backfill_mood_daily():
+    """Rebuild the MoodDaily rollup from existing Mood rows.
+
+    Safe to run while the app is serving: rows are recomputed one (user, day)
+    at a time instead of deleting the table and rebuilding it.
+    """
+    app = create_app()
+    with app.app_context():
+        day = func.date(Mood.created_at)
+        groups = {(user_id, date.fromisoformat(str(day_value)))
+                  for user_id, day_value in db.session.query(Mood.user_id, day).distinct()}
+        # Rollups without moods left behind are zeroed
+        groups.update(db.session.query(MoodDaily.user_id, MoodDaily.date).all())
+        db.session.commit()
+        for user_id, day_value in sorted(groups):
+            _recompute_mood_daily(user_id, day_value)
+        print(f"Rebuilt {len(groups)} daily mood rollups")
+
+def backfill_journal_excerpts(batch_size=500):
+    """Fill Journal.excerpt for entries written before the column existed"""
+    app = create_app()
+    with app.app_context():
+        total = 0
+        while True:
+            rows = db.session.query(Journal.id, Journal.content)\
+                .filter(Journal.excerpt.is_(None))\
+                .order_by(Journal.id)\
+                .limit(batch_size).all()
+            if not rows:
+                break
+            db.session.execute(update(Journal), [
+                {'id': entry_id, 'excerpt': make_excerpt(content)} for entry_id, content in rows
+            ])
+            db.session.commit()
+            total += len(rows)
+        print(f"Backfilled {total} journal excerpts")
+
+def rebuild_search():
+    """Create the journal full-text index if needed and re-index all entries"""
+    app = create_app()
+    with app.app_context():
+        ensure_search_index()
+        rebuild_search_index()
+        print("Journal search index rebuilt")
+
+def analyze_pending_sentiment():
+    """Analyze journal entries still marked pending, e.g. after a worker restart"""
+    from app.sentiment_worker import PENDING, analyze_entry
+    app = create_app()
+    with app.app_context():
+        entry_ids = [entry_id for (entry_id,) in db.session.query(Journal.id).filter_by(sentiment=PENDING)]
+        for entry_id in entry_ids:
+            analyze_entry(entry_id)
+        print(f"Analyzed {len(entry_ids)} pending journal entries")
+
+def refill_content_pools():
+    """Top up the pre-generated affirmation and journal-prompt pools once"""
+    from app.content_pool import content_pool_stats, refill_pools
+    app = create_app()
+    with app.app_context():
+        refill_pools()
+        print(f"Generated {content_pool_stats()['generated']} pool items")
+
+def process_webhook_inbox():
+    """Apply pending Paystack webhooks, e.g. when the in-process worker is disabled"""
+    from app.webhook_inbox import process_webhook_inbox as drain_inbox
+    app = create_app()
+    with app.app_context():
+        print(f"Processed {drain_inbox()} webhook inbox rows")
+
+def send_pending_emails():
+    """Deliver queued emails, e.g. when the in-process worker is disabled"""
+    from app.email_outbox import send_pending_emails as drain_outbox
+    app = create_app()
+    with app.app_context():
+        print(f"Attempted {drain_outbox()} outbox emails")
+
+def _add_missing_columns():
+    """Add nullable model columns (e.g. journal.excerpt) that an existing table lacks"""
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = db.engine.dialect.identifier_preparer
+    added = 0
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                # Existing rows would need a value; these need a hand-written migration
+                print(f"Skipping non-nullable column {table.name}.{column.name}")
+                continue
+            print(f"Adding column {column.name} to {table.name}")
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as conn:
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column_type} NULL"
+                ))
+            added += 1
+    return added
+
+def _create_missing_indexes():
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created = 0
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                print(f"Creating index {index.name} on {table.name}")
+                index.create(bind=db.engine)
+                created += 1
+    return created
+
+def create_missing_indexes():
+    """Create indexes declared on the models that an existing database is missing"""
+    app = create_app()
+    with app.app_context():
+        print(f"Created {_create_missing_indexes()} missing indexes")
+
+COMMANDS = {
+    'init': init_database,
+    'migrate': migrate,
+    'backfill-mood-daily': backfill_mood_daily,
+    'backfill-journal-excerpts': backfill_journal_excerpts,
+    'create-indexes': create_missing_indexes,
+    'rebuild-search-index': rebuild_search,
+    'analyze-pending-sentiment': analyze_pending_sentiment,
+    'refill-content-pools': refill_content_pools,
+    'process-webhook-inbox': process_webhook_inbox,
+    'send-pending-emails': send_pending_emails,
+}
+
 if __name__ == '__main__':
-    init_database()
+    parser = argparse.ArgumentParser(description='MindWell database management')
+    parser.add_argument('command', nargs='?', default='init', choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    COMMANDS[args.command]()
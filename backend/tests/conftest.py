@@ -0,0 +1,59 @@
+"""Shared fixtures: one app on a scratch SQLite file, with background workers off.
+
+Config reads the environment at import time, so it is set here before any app
+module is imported.
+"""
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+os.environ.update({
+    'DATABASE_URL': 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db'),
+    'SECRET_KEY': 'test-secret-key-' + 'x' * 32,
+    'JWT_SECRET_KEY': 'test-jwt-secret-' + 'x' * 32,
+    'BCRYPT_ROUNDS': '4',
+    'PASSWORD_HASH_WORKERS': '0',
+    'SENTIMENT_ASYNC': 'false',
+    'SENTIMENT_MODE': 'local',
+    'SENTIMENT_CACHE_PERSISTENT': 'false',
+    'CONTENT_POOL_REFILL_ENABLED': 'false',
+    'SUBSCRIPTION_EXPIRY_SWEEP_ENABLED': 'false',
+    'WEBHOOK_INBOX_WORKER_ENABLED': 'false',
+    'EMAIL_OUTBOX_WORKER_ENABLED': 'false',
+    'EMAIL_BACKEND': 'console',
+    'METRICS_ENABLED': 'true',
+    'SQL_PROFILER_ENABLED': 'true',
+    'FLASK_ENV': 'testing',
+})
+os.environ.pop('METRICS_DIR', None)
+
+from app import create_app, db  # noqa: E402
+from app.search import ensure_search_index  # noqa: E402
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        ensure_search_index()
+    return app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def auth_headers(client):
+    """Bearer headers for a freshly registered user"""
+    username = f"test_{uuid.uuid4().hex[:12]}"
+    response = client.post('/api/auth/register', json={
+        'username': username, 'email': f"{username}@example.com", 'password': 'test-password'
+    })
+    assert response.status_code == 201, response.get_json()
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
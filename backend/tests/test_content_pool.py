@@ -0,0 +1,44 @@
+from app import content_pool, db
+from app.content_pool import POOLS, REFILL_LEASE, content_pool_stats, refill_pools
+from app.leases import acquire_lease, release_lease
+from app.models import GeneratedContent, JobLease
+
+def test_refill_continues_after_a_failed_pool(app, monkeypatch):
+    failing = POOLS[0]
+
+    def generate(kind, mood, count):
+        if (kind, mood) == failing:
+            raise ValueError('bad completion')
+        return [f'{kind} {mood} {index}' for index in range(count)]
+
+    monkeypatch.setattr(content_pool, 'generate_content', generate)
+    monkeypatch.setitem(app.config, 'CONTENT_POOL_LOW_WATER', 2)
+    monkeypatch.setitem(app.config, 'CONTENT_POOL_HIGH_WATER', 3)
+    with app.app_context():
+        errors = content_pool_stats()['refill_errors']
+        refill_pools()
+        assert content_pool_stats()['refill_errors'] == errors + 1
+        assert content_pool._pool_query(*failing).count() == 0
+        for kind, mood in POOLS[1:]:
+            assert content_pool._pool_query(kind, mood).count() == 3
+        GeneratedContent.query.delete()
+        db.session.commit()
+
+def test_refill_skips_while_another_process_holds_the_lease(app, monkeypatch):
+    monkeypatch.setattr(content_pool, 'generate_content', lambda *args: ['unused'])
+    with app.app_context():
+        assert acquire_lease(REFILL_LEASE, 60)
+        db.session.get(JobLease, REFILL_LEASE).holder = 'other-host:1'
+        db.session.commit()
+
+        skipped = content_pool_stats()['refills_skipped']
+        refill_pools()
+        assert content_pool_stats()['refills_skipped'] == skipped + 1
+        assert GeneratedContent.query.count() == 0
+
+        # Gone once the other holder's lease lapses
+        lease = db.session.get(JobLease, REFILL_LEASE)
+        lease.expires_at = lease.expires_at.replace(year=2000)
+        db.session.commit()
+        assert acquire_lease(REFILL_LEASE, 60)
+        release_lease(REFILL_LEASE)
@@ -0,0 +1,20 @@
+from app import dashboard_cache
+
+def test_write_on_another_worker_invalidates_cached_summary(client, auth_headers, monkeypatch):
+    summary = client.get('/api/dashboard/summary', headers=auth_headers).get_json()
+    assert summary['todays_mood']['mood'] is None
+
+    # A write handled by another process cannot touch this process's LRU;
+    # only the shared version bump reaches it
+    monkeypatch.setattr(dashboard_cache.summary_cache, 'delete_matching', lambda predicate: None)
+    response = client.post('/api/mood/log', json={'mood': 5}, headers=auth_headers)
+    assert response.status_code == 201
+
+    summary = client.get('/api/dashboard/summary', headers=auth_headers).get_json()
+    assert summary['todays_mood']['mood'] == 5
+
+def test_repeat_reads_are_served_from_cache(client, auth_headers):
+    client.get('/api/dashboard/summary', headers=auth_headers)
+    hits = dashboard_cache.summary_cache.stats()['hits']
+    client.get('/api/dashboard/summary', headers=auth_headers)
+    assert dashboard_cache.summary_cache.stats()['hits'] == hits + 1
@@ -0,0 +1,124 @@
+import smtplib
+import socket
+import threading
+from string import Template
+
+import pytest
+
+from app import db, email_outbox
+from app.email_outbox import enqueue_email, send_pending_emails
+from app.email_service import EmailService, render_email
+from app.models import EmailOutbox, Mood
+from config import Config
+
+def _message(to_address):
+    return render_email(to_address, 'Hello', Template('<p>$name</p>'), Template('$name'), name='MindWell')
+
+def _clear_outbox():
+    EmailOutbox.query.delete()
+    db.session.commit()
+
+def test_enqueue_leaves_the_commit_to_the_caller(app):
+    with app.app_context():
+        _clear_outbox()
+        enqueue_email(_message('rolled-back@example.com'))
+        db.session.rollback()
+        assert EmailOutbox.query.count() == 0
+
+        enqueue_email(_message('committed@example.com'))
+        db.session.commit()
+        assert [row.to_address for row in EmailOutbox.query] == ['committed@example.com']
+        _clear_outbox()
+
+def test_email_service_rolls_back_when_queueing_fails(app, monkeypatch):
+    def broken_enqueue(msg):
+        db.session.add(Mood(user_id=None, mood=3))
+        raise RuntimeError('outbox unavailable')
+
+    monkeypatch.setattr(email_outbox, 'enqueue_email', broken_enqueue)
+    with app.app_context():
+        assert EmailService().send_verification_email('user@example.com', 'user', 'token') is False
+        assert not db.session.new
+
+def test_concurrent_sweeps_send_each_email_once(app, monkeypatch):
+    sent = []
+    sent_lock = threading.Lock()
+
+    def deliver(message):
+        with sent_lock:
+            sent.append(message)
+
+    monkeypatch.setitem(email_outbox.BACKENDS, 'console', deliver)
+    with app.app_context():
+        _clear_outbox()
+        for index in range(20):
+            enqueue_email(_message(f'user{index}@example.com'))
+        db.session.commit()
+
+    def sweep():
+        with app.app_context():
+            send_pending_emails(batch_size=5)
+
+    threads = [threading.Thread(target=sweep) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(sent) == 20
+    with app.app_context():
+        assert {row.status for row in EmailOutbox.query} == {'sent'}
+        _clear_outbox()
+
+def test_failed_send_is_rescheduled_outside_the_claim(app, monkeypatch):
+    def refuse(message):
+        raise smtplib.SMTPRecipientsRefused({'nobody@example.com': (550, b'No such user')})
+
+    monkeypatch.setitem(email_outbox.BACKENDS, 'console', refuse)
+    with app.app_context():
+        _clear_outbox()
+        enqueue_email(_message('nobody@example.com'))
+        db.session.commit()
+        assert send_pending_emails() == 1
+        row = EmailOutbox.query.one()
+        assert (row.status, row.attempts) == ('failed', 1)
+        _clear_outbox()
+
+def test_smtp_backend_delivers_through_a_local_server(app, monkeypatch):
+    controller_module = pytest.importorskip('aiosmtpd.controller')
+    received = []
+
+    class Collect:
+        async def handle_DATA(self, server, session, envelope):
+            received.append(envelope)
+            return '250 Message accepted for delivery'
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    controller = controller_module.Controller(Collect(), hostname='127.0.0.1', port=port)
+    controller.start()
+
+    monkeypatch.setattr(Config, 'EMAIL_BACKEND', 'smtp')
+    monkeypatch.setattr(Config, 'SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setattr(Config, 'SMTP_PORT', port)
+    monkeypatch.setattr(Config, 'SMTP_USE_TLS', False)
+    monkeypatch.setattr(Config, 'SMTP_USERNAME', None)
+    monkeypatch.setattr(email_outbox, '_pool', None)
+    try:
+        with app.app_context():
+            _clear_outbox()
+            enqueue_email(_message('smtp-user@example.com'))
+            db.session.commit()
+            assert send_pending_emails() == 1
+
+            row = EmailOutbox.query.one()
+            assert (row.status, row.attempts) == ('sent', 1)
+            assert row.sent_at is not None
+            _clear_outbox()
+    finally:
+        email_outbox.get_pool().close()
+        controller.stop()
+
+    assert [envelope.rcpt_tos for envelope in received] == [['smtp-user@example.com']]
+    assert b'Subject: Hello' in received[0].content
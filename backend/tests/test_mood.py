@@ -0,0 +1,21 @@
+def test_log_mood_updates_stats(client, auth_headers):
+    for value in (2, 4, 4):
+        response = client.post('/api/mood/log', json={'mood': value}, headers=auth_headers)
+        assert response.status_code == 201
+
+    stats = client.get('/api/mood/stats', headers=auth_headers).get_json()
+    assert stats['average_mood'] == 3.33
+    assert stats['mood_distribution'] == {'2': 1, '4': 2}
+
+def test_log_mood_rejects_booleans(client, auth_headers):
+    for value in (True, False):
+        response = client.post('/api/mood/log', json={'mood': value}, headers=auth_headers)
+        assert response.status_code == 400
+
+    stats = client.get('/api/mood/stats', headers=auth_headers).get_json()
+    assert stats['mood_distribution'] == {}
+
+def test_log_mood_rejects_out_of_range(client, auth_headers):
+    for value in (0, 6, 3.5, '3', None):
+        response = client.post('/api/mood/log', json={'mood': value}, headers=auth_headers)
+        assert response.status_code == 400
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from app import db
+from app.models import Mood, MoodDaily
+from init_db import _recompute_mood_daily
+
+def _rollup(user_id, day):
+    db.session.expire_all()
+    return MoodDaily.query.filter_by(user_id=user_id, date=day).one()
+
+def test_recompute_fixes_a_drifted_rollup_in_place(app, client, auth_headers):
+    for value in (1, 5, 5):
+        assert client.post('/api/mood/log', json={'mood': value}, headers=auth_headers).status_code == 201
+
+    with app.app_context():
+        mood = Mood.query.order_by(Mood.id.desc()).first()
+        user_id, day = mood.user_id, mood.created_at.date()
+        rollup = _rollup(user_id, day)
+        rollup.mood_sum, rollup.count_5 = 99, 0
+        db.session.commit()
+
+        _recompute_mood_daily(user_id, day)
+        rollup = _rollup(user_id, day)
+        assert (rollup.mood_sum, rollup.mood_count, rollup.count_1, rollup.count_5) == (11, 3, 1, 2)
+
+def test_recompute_creates_a_missing_rollup(app, client, auth_headers):
+    assert client.post('/api/mood/log', json={'mood': 3}, headers=auth_headers).status_code == 201
+
+    with app.app_context():
+        mood = Mood.query.order_by(Mood.id.desc()).first()
+        user_id, day = mood.user_id, mood.created_at.date()
+        MoodDaily.query.filter_by(user_id=user_id).delete()
+        db.session.commit()
+
+        _recompute_mood_daily(user_id, day)
+        rollup = _rollup(user_id, day)
+        assert (rollup.mood_sum, rollup.mood_count, rollup.count_3) == (3, 1, 1)
+
+        # Moods logged afterwards keep incrementing the same row
+        db.session.commit()
+    assert client.post('/api/mood/log', json={'mood': 4}, headers=auth_headers).status_code == 201
+    with app.app_context():
+        rollup = _rollup(user_id, day)
+        assert (rollup.mood_sum, rollup.mood_count) == (7, 2)
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import openai_client
+from app.openai_client import CircuitBreaker, chat_completion, stream_chat_completion
+
+class RaisingClient:
+    """Fails every completion with an error the client has no specific handling for"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=self)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        raise ValueError('unexpected response shape')
+
+@pytest.fixture
+def half_open_breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    monkeypatch.setattr(openai_client, 'breaker', breaker)
+    return breaker
+
+@pytest.mark.parametrize('call', [
+    lambda: chat_completion([{'role': 'user', 'content': 'hi'}], max_tokens=5, temperature=0),
+    lambda: next(stream_chat_completion([{'role': 'user', 'content': 'hi'}], max_tokens=5, temperature=0)),
+])
+def test_probe_raising_an_unexpected_error_still_releases_the_breaker(half_open_breaker, monkeypatch, call):
+    client = RaisingClient()
+    monkeypatch.setattr(openai_client, 'get_client', lambda: client)
+
+    with pytest.raises(ValueError):
+        call()
+    assert half_open_breaker.stats()['state'] == CircuitBreaker.OPEN
+
+    # Once the cool-down passes, the next caller gets a fresh probe instead of a stuck breaker
+    with pytest.raises(ValueError):
+        call()
+    assert client.calls == 2
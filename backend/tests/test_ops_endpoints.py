@@ -0,0 +1,32 @@
+import pytest
+
+OUTSIDE = {'REMOTE_ADDR': '203.0.113.9'}
+
+def test_stats_is_open_to_loopback(client):
+    response = client.get('/stats')
+    assert response.status_code == 200
+    assert 'dashboard_cache' in response.get_json()
+
+def test_stats_rejects_other_addresses_without_token(client):
+    assert client.get('/stats', environ_base=OUTSIDE).status_code == 403
+
+@pytest.mark.parametrize('header, status', [
+    ('Bearer ops-secret', 200),
+    ('Bearer wrong', 403),
+    ('ops-secret', 403),
+])
+def test_stats_accepts_the_ops_token(app, client, monkeypatch, header, status):
+    monkeypatch.setitem(app.config, 'OPS_TOKEN', 'ops-secret')
+    response = client.get('/stats', environ_base=OUTSIDE, headers={'Authorization': header})
+    assert response.status_code == status
+
+def test_metrics_requires_ops_access(app, client, monkeypatch):
+    client.get('/health')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert 'mindwell_http_requests_total' in response.get_data(as_text=True)
+
+    assert client.get('/metrics', environ_base=OUTSIDE).status_code == 403
+    monkeypatch.setitem(app.config, 'OPS_TOKEN', 'ops-secret')
+    response = client.get('/metrics', environ_base=OUTSIDE, headers={'Authorization': 'Bearer ops-secret'})
+    assert response.status_code == 200
@@ -0,0 +1,39 @@
+from concurrent.futures import Future
+import threading
+
+import pytest
+
+from app import password_hashing
+from app.password_hashing import PasswordHashingBusy, hash_password, verify_password
+from config import Config
+
+class StalledExecutor:
+    """Accepts jobs that never finish, like a pool whose workers are all stuck"""
+
+    def submit(self, func, *args):
+        return Future()
+
+@pytest.fixture
+def pooled(monkeypatch):
+    monkeypatch.setattr(Config, 'PASSWORD_HASH_WORKERS', 1)
+    monkeypatch.setattr(password_hashing, '_executor', None)
+
+def test_pool_processes_come_from_a_forkserver(pooled):
+    password_hash = hash_password('correct horse')
+    assert verify_password('correct horse', password_hash)
+    assert password_hashing._executor._mp_context.get_start_method() == 'forkserver'
+    password_hashing._executor.shutdown()
+
+def test_timed_out_hash_answers_503_with_retry_after(pooled, client, monkeypatch):
+    slots = threading.BoundedSemaphore(2)
+    monkeypatch.setattr(password_hashing, '_get_executor', lambda: (StalledExecutor(), slots))
+    monkeypatch.setattr(Config, 'PASSWORD_HASH_TIMEOUT', 0.01)
+
+    with pytest.raises(PasswordHashingBusy):
+        hash_password('correct horse')
+
+    response = client.post('/api/auth/register', json={
+        'username': 'stalled_hash', 'email': 'stalled@example.com', 'password': 'test-password'
+    })
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(Config.PASSWORD_HASH_RETRY_AFTER)
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+from app import db
+from check_query_plans import full_scans
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def test_endpoints_avoid_full_table_scans():
+    # A separate process gets its own in-memory database and its own OpenAI stub
+    env = dict(os.environ, DATABASE_URL='sqlite://')
+    result = subprocess.run(
+        [sys.executable, 'check_query_plans.py'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'No full table scans found' in result.stdout
+
+def test_unindexed_filter_is_reported_as_full_scan(app):
+    with app.app_context(), db.engine.connect() as conn:
+        tables = set(db.metadata.tables)
+        assert full_scans(conn, 'SELECT id FROM user WHERE password_hash = ?', ('x',), tables) == ['user']
+        assert full_scans(conn, 'SELECT id FROM user WHERE username = ?', ('x',), tables) == []
@@ -0,0 +1,42 @@
+import logging
+
+import pytest
+from flask import Response
+
+from app import db
+from app.models import Habit
+from app.query_stats import assert_max_queries, statement_shape
+
+def test_habit_list_stays_within_query_budget(client, auth_headers):
+    for name in ('Water', 'Walk', 'Read'):
+        response = client.post('/api/habits/create', json={'name': name, 'goal': 1}, headers=auth_headers)
+        assert response.status_code == 201
+
+    with assert_max_queries(4):
+        response = client.get('/api/habits/list', headers=auth_headers)
+    assert response.status_code == 200
+    assert int(response.headers['X-Query-Count']) <= 4
+
+def test_assert_max_queries_lists_statement_shapes(app):
+    with app.app_context():
+        with pytest.raises(AssertionError, match=r'6 queries executed, expected at most 2'):
+            with assert_max_queries(2):
+                for habit_id in range(6):
+                    db.session.get(Habit, habit_id + 1000)
+
+def test_profiler_flags_n_plus_one(app, caplog):
+    with app.test_request_context('/api/habits/list'):
+        app.preprocess_request()
+        # One lookup per id, the shape an N+1 loop produces
+        for habit_id in range(app.config['SQL_N_PLUS_ONE_THRESHOLD']):
+            Habit.query.filter_by(id=habit_id + 1000).first()
+        with caplog.at_level(logging.WARNING, logger=app.logger.name):
+            app.process_response(Response())
+
+    warnings = [record.getMessage() for record in caplog.records if 'Possible N+1' in record.getMessage()]
+    assert len(warnings) == 1
+    assert 'FROM habit' in warnings[0]
+
+def test_statement_shape_collapses_literals_and_lists():
+    assert statement_shape("SELECT * FROM habit WHERE id IN (?, ?, ?) AND name = 'x' LIMIT 5") == \
+        statement_shape("SELECT * FROM habit WHERE id IN (?) AND name = 'y' LIMIT 10")
@@ -0,0 +1,22 @@
+from app import db
+from app import search
+from app.search import FTS_TABLE, ensure_search_index, search_available
+
+def test_missing_index_is_rechecked(app, monkeypatch):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP TABLE {FTS_TABLE}")
+        search._available.clear()
+        assert not search_available()
+
+        # Another process (init_db.py migrate) creates the index
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"title, content, content='journal', content_rowid='id', tokenize='porter unicode61')"
+            )
+        assert not search_available()
+
+        monkeypatch.setattr(search, 'MISSING_INDEX_RECHECK_SECONDS', 0)
+        assert search_available()
+        ensure_search_index()
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from app.sentiment_batch import MicroBatcher, pack_batches
+
+def test_pack_batches_respects_item_limit():
+    assert pack_batches(['a', 'b', 'c'], token_budget=1000, max_items=2) == [['a', 'b'], ['c']]
+
+def test_idle_batcher_runs_immediately():
+    calls = []
+    batcher = MicroBatcher(lambda items: calls.append(items) or [item.upper() for item in items])
+
+    start = time.perf_counter()
+    result = batcher.submit('calm', window_seconds=5, max_items=10).result(timeout=1)
+    assert result == 'CALM'
+    assert time.perf_counter() - start < 1
+    assert calls == [['calm']]
+    assert batcher._flusher is None
+
+def test_items_arriving_during_a_batch_share_the_next_one():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def handler(items):
+        calls.append(items)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+        return items
+
+    batcher = MicroBatcher(handler)
+    first = threading.Thread(target=lambda: batcher.submit('first', window_seconds=0.05, max_items=10).result(timeout=5))
+    first.start()
+    started.wait(5)
+
+    futures = [batcher.submit(item, window_seconds=0.05, max_items=10) for item in ('a', 'b', 'c')]
+    release.set()
+    assert [future.result(timeout=5) for future in futures] == ['a', 'b', 'c']
+    first.join()
+    assert calls == [['first'], ['a', 'b', 'c']]
+
+def test_submit_flushes_at_the_item_limit_it_was_given():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def handler(items):
+        calls.append(items)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+        return items
+
+    batcher = MicroBatcher(handler)
+    first = threading.Thread(target=lambda: batcher.submit('first', window_seconds=5, max_items=2).result(timeout=5))
+    first.start()
+    started.wait(5)
+
+    # The second item reaches the limit and runs at once instead of waiting out the window
+    pending = batcher.submit('a', window_seconds=5, max_items=2)
+    assert batcher.submit('b', window_seconds=5, max_items=2).result(timeout=1) == 'b'
+    assert pending.result(timeout=1) == 'a'
+    release.set()
+    first.join()
+    assert calls == [['first'], ['a', 'b']]
+
+def test_openai_batches_follow_the_app_config(app, monkeypatch):
+    from app import ai_integration, sentiment_batch
+
+    chunks = []
+    monkeypatch.setattr(sentiment_batch, '_classify_chunk', lambda texts: chunks.append(texts) or ['neutral'] * len(texts))
+    monkeypatch.setitem(app.config, 'SENTIMENT_BATCH_MAX_ITEMS', 2)
+    monkeypatch.setitem(app.config, 'SENTIMENT_MICROBATCH_WINDOW_MS', 0)
+
+    with app.app_context():
+        labels = ai_integration._classify_with_openai(['one', 'two', 'three', 'four'])
+    assert labels == ['neutral'] * 4
+    assert chunks == [['one', 'two'], ['three', 'four']]
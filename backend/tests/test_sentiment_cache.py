@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from app import db
+from app.models import SentimentCache
+from app.query_stats import assert_max_queries
+from app.sentiment_cache import get_cached_sentiments, memory_cache, sentiment_cache_key
+
+def test_batch_lookup_checks_memory_then_one_query_for_the_rest(app):
+    keys = [sentiment_cache_key(f"batch lookup text {n}") for n in range(4)]
+    app.config['SENTIMENT_CACHE_PERSISTENT'] = True
+    try:
+        with app.app_context():
+            db.session.add_all([
+                SentimentCache(text_hash=keys[1], sentiment='positive', created_at=datetime.utcnow()),
+                SentimentCache(text_hash=keys[2], sentiment='negative', created_at=datetime.utcnow()),
+            ])
+            db.session.commit()
+            memory_cache.set(keys[0], 'neutral')
+
+            with assert_max_queries(1):
+                found = get_cached_sentiments(keys + keys[:1])
+            assert found == {keys[0]: 'neutral', keys[1]: 'positive', keys[2]: 'negative'}
+
+            # Database hits are promoted to the memory tier
+            with assert_max_queries(0):
+                assert get_cached_sentiments(keys[:3]) == found
+    finally:
+        app.config['SENTIMENT_CACHE_PERSISTENT'] = False
+        for key in keys:
+            memory_cache.delete(key)
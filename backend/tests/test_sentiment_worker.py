@@ -0,0 +1,43 @@
+import threading
+
+from app import db, sentiment_worker
+from app.models import Journal
+
+def test_inline_analysis_fills_in_sentiment(client, auth_headers):
+    response = client.post('/api/journal/entry', json={
+        'title': 'Good day', 'content': 'I feel happy and grateful today.'
+    }, headers=auth_headers)
+    assert response.status_code == 201
+    assert response.get_json()['entry']['sentiment'] == 'positive'
+
+def test_full_queue_leaves_entries_pending(app, client, auth_headers, monkeypatch):
+    release = threading.Event()
+
+    def blocked_analysis(text):
+        release.wait(5)
+        return 'neutral'
+
+    monkeypatch.setattr(sentiment_worker, 'analyze_sentiment', blocked_analysis)
+    monkeypatch.setattr(sentiment_worker, '_executor', None)
+    monkeypatch.setitem(app.config, 'SENTIMENT_ASYNC', True)
+    monkeypatch.setitem(app.config, 'SENTIMENT_WORKERS', 1)
+    monkeypatch.setitem(app.config, 'SENTIMENT_QUEUE_LIMIT', 1)
+    dropped = sentiment_worker.worker_stats()['dropped']
+
+    entry_ids = []
+    for index in range(3):
+        response = client.post('/api/journal/entry', json={
+            'title': f'Entry {index}', 'content': 'Nothing much happened.'
+        }, headers=auth_headers)
+        assert response.status_code == 201
+        entry_ids.append(response.get_json()['entry']['id'])
+
+    # One entry is being analyzed, one waits and the third is not queued
+    assert sentiment_worker.worker_stats()['dropped'] == dropped + 1
+    release.set()
+    executor, _ = sentiment_worker._get_executor(1, 1)
+    executor.shutdown(wait=True)
+
+    with app.app_context():
+        sentiments = [db.session.get(Journal, entry_id).sentiment for entry_id in entry_ids]
+    assert sentiments == ['neutral', 'neutral', sentiment_worker.PENDING]
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+from app import db
+from app.models import User
+from app.subscriptions import Subscription, current_subscription, issue_access_token
+
+def _premium_headers(app, auth_headers):
+    with app.test_request_context(headers=auth_headers):
+        verify_jwt_in_request()
+        user = db.session.get(User, int(get_jwt_identity()))
+        user.subscription_status = 'premium'
+        user.subscription_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.commit()
+        token = issue_access_token(user.id, Subscription.of(user))
+    return {'Authorization': f'Bearer {token}'}
+
+def _is_premium(app, headers):
+    with app.test_request_context(headers=headers):
+        verify_jwt_in_request()
+        return current_subscription().is_premium()
+
+def test_cancel_revokes_premium_for_existing_tokens(app, client, auth_headers):
+    headers = _premium_headers(app, auth_headers)
+    assert _is_premium(app, headers)
+
+    response = client.post('/api/payment/cancel-subscription', headers=headers)
+    assert response.status_code == 200
+    assert 'access_token' in response.get_json()
+
+    # The token signed while premium no longer grants it
+    assert not _is_premium(app, headers)
+
+def test_expiry_sweep_skips_while_another_process_holds_the_lease(app, auth_headers):
+    from app.leases import acquire_lease
+    from app.models import JobLease
+    from app.subscription_expiry import SWEEP_LEASE, expiry_stats, sweep_expired_subscriptions
+
+    _premium_headers(app, auth_headers)
+    with app.test_request_context(headers=auth_headers):
+        verify_jwt_in_request()
+        user = db.session.get(User, int(get_jwt_identity()))
+        user.subscription_expires_at = datetime.utcnow() - timedelta(minutes=1)
+        assert acquire_lease(SWEEP_LEASE, 60)
+        db.session.get(JobLease, SWEEP_LEASE).holder = 'other-host:1'
+        db.session.commit()
+
+        skipped = expiry_stats()['sweeps_skipped']
+        assert sweep_expired_subscriptions() == 0
+        assert expiry_stats()['sweeps_skipped'] == skipped + 1
+        db.session.refresh(user)
+        assert user.subscription_status == 'premium'
+
+        # Swept once the other holder's lease lapses
+        lease = db.session.get(JobLease, SWEEP_LEASE)
+        lease.expires_at = lease.expires_at.replace(year=2000)
+        db.session.commit()
+        assert sweep_expired_subscriptions() >= 1
+        db.session.refresh(user)
+        assert user.subscription_status == 'expired'
@@ -0,0 +1,42 @@
+import uuid
+
+from app import db
+from app.leases import acquire_lease
+from app.models import JobLease, Payment, User, WebhookInbox
+from app.webhook_inbox import DRAIN_LEASE, enqueue_webhook, process_webhook_inbox, webhook_inbox_stats
+
+def _queue_charge(client, auth_headers):
+    email = client.get('/api/auth/profile', headers=auth_headers).get_json()['user']['email']
+    reference = f"ref_{uuid.uuid4().hex[:12]}"
+    data = {'reference': reference, 'amount': 50000, 'currency': 'KES', 'customer': {'email': email}}
+    assert enqueue_webhook('charge.success', reference, {'event': 'charge.success', 'data': data})
+    return reference, data
+
+def test_drain_records_the_payment_with_its_metadata(app, client, auth_headers):
+    with app.app_context():
+        reference, data = _queue_charge(client, auth_headers)
+        assert process_webhook_inbox() >= 1
+
+        payment = Payment.query.filter_by(paystack_reference=reference).one()
+        assert payment.payment_metadata == data
+        assert db.session.get(User, payment.user_id).subscription_status == 'premium'
+        assert WebhookInbox.query.filter_by(reference=reference).one().processed_at is not None
+
+def test_drain_skips_while_another_process_holds_the_lease(app, client, auth_headers):
+    with app.app_context():
+        reference, _ = _queue_charge(client, auth_headers)
+        assert acquire_lease(DRAIN_LEASE, 60)
+        db.session.get(JobLease, DRAIN_LEASE).holder = 'other-host:1'
+        db.session.commit()
+
+        skipped = webhook_inbox_stats()['drains_skipped']
+        assert process_webhook_inbox() == 0
+        assert webhook_inbox_stats()['drains_skipped'] == skipped + 1
+        assert Payment.query.filter_by(paystack_reference=reference).count() == 0
+
+        # Drained once the other holder's lease lapses
+        lease = db.session.get(JobLease, DRAIN_LEASE)
+        lease.expires_at = lease.expires_at.replace(year=2000)
+        db.session.commit()
+        assert process_webhook_inbox() >= 1
+        assert Payment.query.filter_by(paystack_reference=reference).count() == 1
@@ -8,12 +8,14 @@ export interface PaymentVerificationResponse {
   message: string;
   subscription_status: string;
   expires_at: string;
+  access_token?: string;
 }
 
 export interface SubscriptionStatus {
   subscription_status: string;
   is_premium: boolean;
   expires_at: string | null;
+  access_token?: string;
 }
 
 export interface PaymentHistoryItem {
@@ -55,7 +57,12 @@ class PaymentService {
       throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
     }
 
-    return response.json();
+    const data = await response.json();
+    // Payment endpoints re-issue the token when the subscription changes; use it from now on
+    if (data && typeof data.access_token === 'string') {
+      localStorage.setItem('authToken', data.access_token);
+    }
+    return data;
   }
 
   async verifyPayment(reference: string): Promise<PaymentVerificationResponse> {
@@ -69,8 +76,8 @@ class PaymentService {
     return this.makeRequest<SubscriptionStatus>('/subscription-status');
   }
 
-  async cancelSubscription(): Promise<{ message: string; subscription_status: string }> {
-    return this.makeRequest<{ message: string; subscription_status: string }>('/cancel-subscription', {
+  async cancelSubscription(): Promise<{ message: string; subscription_status: string; access_token?: string }> {
+    return this.makeRequest<{ message: string; subscription_status: string; access_token?: string }>('/cancel-subscription', {
       method: 'POST',
     });
   }